@@ -5,20 +5,19 @@ A Streamlit app that transforms messy event notes into professional IEEE reports
 using a pipeline of specialized AI agents: Auditor → Ghostwriter → Critic.
 """
 import streamlit as st
-import os
+from datetime import datetime
 
-# Clean imports at top level
-from core.critic import check_consistency
-from core.ghostwriter import generate_narrative
-from core.renderer import render_report
-from core.templates import load_templates, get_builtin_templates, apply_template, increment_use_count
-from core.llm import reset_client, RateLimitError, AuthenticationError
-from ui.handlers import handle_text_process, handle_audio_process
+# Lightweight imports at top level - modules that pull in the Gemini SDK or
+# docxtpl are imported past the API key gate, so the gate renders without
+# loading them
 from ui.components import (
+    render_header_image,
+    render_auth_error,
     render_smart_form, 
     render_progress_stepper, 
     render_confidence_badge,
     render_template_selector,
+    load_all_templates,
     render_save_template_modal,
     agent_spinner
 )
@@ -43,7 +42,6 @@ def init_session_state():
         "final_report": None,
         "critic_verdict": None,
         "processing": False,
-        "docx_stream": None,
         "selected_template": None,
         "api_key": None,  # User's API key (session-scoped, secure)
     }
@@ -62,8 +60,7 @@ if not st.session_state.get("api_key"):
     
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
-        if os.path.exists("assets/ieee_header.png"):
-            st.image("assets/ieee_header.png", use_container_width=True)
+        render_header_image()
         
         st.title("🫘 Bean")
         st.markdown("*Turn your messy notes into professional IEEE reports.*")
@@ -84,6 +81,10 @@ if not st.session_state.get("api_key"):
             if api_key_input.strip():
                 # Store in session state ONLY (not os.environ - that's shared!)
                 st.session_state["api_key"] = api_key_input.strip()
+                
+                # Connect while the user types their notes
+                from core.llm import warm_up_client
+                warm_up_client(st.session_state["api_key"])
                 st.rerun()
             else:
                 st.error("Please enter a valid API key.")
@@ -94,10 +95,92 @@ if not st.session_state.get("api_key"):
     st.stop()  # Don't render the rest of the app
 
 
+# Agent and export modules - everything past the gate needs the Gemini SDK,
+# so they're imported together here rather than inside each stage
+from core.llm import reset_client, run_async, RateLimitError, AuthenticationError
+from core.critic import acheck_consistency, build_critic_inputs
+from core.ghostwriter import agenerate_narrative
+from core.renderer import render_report
+from core.templates import schedule_use_count_increment
+from ui.handlers import (
+    handle_text_process,
+    handle_audio_process,
+    start_speculative_narrative,
+    resolve_speculative_narrative
+)
+
+
+# --- REPORT PIPELINE ---
+def _start_speculation(facts: EventFacts):
+    """
+    Starts the Ghostwriter and Critic on the Auditor's facts while the user reviews them.
+    
+    If the facts are confirmed unchanged, the verify stage reuses the draft
+    and the Critic's cached verdict instead of waiting for fresh calls.
+    """
+    st.session_state["speculative_facts"] = facts.model_copy(deep=True)
+    st.session_state["speculative_narrative"] = start_speculative_narrative(
+        facts, st.session_state["raw_text_context"], st.session_state["api_key"]
+    )
+
+
+def _record_template_use(template_id: str):
+    """
+    Bumps a template's use count in the background.
+    
+    Use counts drive the selector order, so the cached template list is
+    cleared once the write has landed, not when it is queued (a rerun in
+    between would otherwise re-cache the stale counts for the full TTL).
+    """
+    future = schedule_use_count_increment(template_id)
+    future.add_done_callback(lambda _: load_all_templates.clear())
+
+
+async def _draft_and_verify(verified_facts: EventFacts, raw_text_context: str, api_key: str):
+    """
+    Runs the Ghostwriter, then the Critic on its output, on the async agents.
+    
+    The Ghostwriter reuses the speculative draft when the facts weren't
+    edited, and otherwise streams a new narrative into the page. The Critic
+    then checks that narrative against the source. The two steps run strictly
+    in sequence, since the Critic needs the Ghostwriter's output.
+    
+    Returns:
+        Tuple of (FullReport, CriticVerdict)
+    """
+    # Trigger Ghostwriter (reusing the speculative draft if the facts weren't edited)
+    with agent_spinner("Ghostwriter", "Drafting the narrative..."):
+        narrative = await resolve_speculative_narrative(
+            st.session_state.pop("speculative_narrative", None),
+            st.session_state.pop("speculative_facts", None),
+            verified_facts
+        )
+        if narrative is None:
+            # Stream the summary in as it's written rather than showing only a spinner
+            preview = st.empty()
+            narrative = await agenerate_narrative(
+                verified_facts, raw_text_context, api_key=api_key, on_summary=preview.markdown
+            )
+    
+    # Combine into Full Report
+    report = FullReport(
+        facts=verified_facts,
+        narrative=narrative,
+        confidence_score=1.0
+    )
+    
+    # Critic Pass - only check AI-generated narrative, not user-verified facts
+    # The narrative is what the AI created; facts are already human-verified
+    with agent_spinner("Critic", "Verifying for hallucinations..."):
+        source_text, narrative_text = build_critic_inputs(verified_facts, narrative, raw_text_context)
+        verdict = await acheck_consistency(source_text, narrative_text, api_key=api_key)
+    
+    return report, verdict
+
+
 # --- SIDEBAR (shown after API key is set) ---
 with st.sidebar:
-    if os.path.exists("assets/ieee_header.png"):
-        st.image("assets/ieee_header.png", use_container_width=True)
+    render_header_image()
     st.title("⚙️ Settings")
     
     # Show current API key status with option to change
@@ -156,11 +239,13 @@ render_progress_stepper(st.session_state["stage"])
 
 
 # --- STAGE 1: INPUT ---
-if st.session_state["stage"] == "input":
+@st.fragment
+def render_input_stage():
+    """Template selection and note input (text or audio)."""
     st.header("📝 Feed the Bean")
     
     # Template Selection
-    all_templates = get_builtin_templates() + load_templates()
+    all_templates = load_all_templates()
     selected_template = render_template_selector(all_templates)
     
     if selected_template:
@@ -221,25 +306,18 @@ if st.session_state["stage"] == "input":
                         if not extracted_facts.agenda:
                             extracted_facts.agenda = template.suggested_agenda
                         
-                        # Increment template usage
-                        increment_use_count(template.id)
+                        # Increment template usage (written in the background)
+                        _record_template_use(template.id)
                     
                     st.session_state["facts"] = extracted_facts
+                    _start_speculation(extracted_facts)
                     st.session_state["stage"] = "verify"
                     st.rerun()
                 except RateLimitError as e:
                     st.error(f"⏳ {e.message}")
                     st.info("💡 **Tip:** The free tier allows ~15-20 requests/minute. Wait a moment and try again.")
                 except AuthenticationError as e:
-                    st.error(f"🔑 {e.message}")
-                    st.warning("Your API key appears to be invalid. Please check that you've copied the full key from [Google AI Studio](https://aistudio.google.com/apikey).")
-                    if st.button("🔄 Enter a New API Key"):
-                        old_key = st.session_state.get("api_key")
-                        st.session_state["api_key"] = None
-                        st.session_state["stage"] = "input"  # Go back to API gate
-                        reset_client(old_key)  # Clear cached invalid client
-                        # Use JS to trigger full page refresh for clean state
-                        st.markdown('<meta http-equiv="refresh" content="0">', unsafe_allow_html=True)
+                    render_auth_error(e)
                 except ValueError as e:
                     st.error(f"❌ Processing failed: {e}")
                 finally:
@@ -284,9 +362,10 @@ if st.session_state["stage"] == "input":
                                     extracted_facts.target_audience = template.default_target_audience
                                 if not extracted_facts.agenda:
                                     extracted_facts.agenda = template.suggested_agenda
-                                increment_use_count(template.id)
+                                _record_template_use(template.id)
                             
                             st.session_state["facts"] = extracted_facts
+                            _start_speculation(extracted_facts)
                             st.session_state["stage"] = "verify"
                             st.rerun()
                         else:
@@ -295,14 +374,7 @@ if st.session_state["stage"] == "input":
                         st.error(f"⏳ {e.message}")
                         st.info("💡 **Tip:** The free tier allows ~15-20 requests/minute. Wait a moment and try again.")
                     except AuthenticationError as e:
-                        st.error(f"🔑 {e.message}")
-                        st.warning("Your API key appears to be invalid. Please check that you've copied the full key from [Google AI Studio](https://aistudio.google.com/apikey).")
-                        if st.button("🔄 Enter a New API Key", key="audio_new_key"):
-                            old_key = st.session_state.get("api_key")
-                            st.session_state["api_key"] = None
-                            st.session_state["stage"] = "input"
-                            reset_client(old_key)
-                            st.markdown('<meta http-equiv="refresh" content="0">', unsafe_allow_html=True)
+                        render_auth_error(e, button_key="audio_new_key")
                     except ValueError as e:
                         st.error(f"❌ Audio processing failed: {e}")
                     finally:
@@ -310,7 +382,9 @@ if st.session_state["stage"] == "input":
 
 
 # --- STAGE 2: VERIFICATION (Smart Form) ---
-elif st.session_state["stage"] == "verify":
+@st.fragment
+def render_verify_stage():
+    """Smart Form review, then Ghostwriter + Critic on submit."""
     st.header("🔍 Verify the Facts")
     
     # Show template in use (if any)
@@ -325,50 +399,11 @@ elif st.session_state["stage"] == "verify":
         st.session_state["facts"] = updated_facts
         
         try:
-            # Trigger Ghostwriter
-            with agent_spinner("Ghostwriter", "Drafting the narrative..."):
-                narrative = generate_narrative(
-                    st.session_state["facts"], 
-                    st.session_state["raw_text_context"],
-                    api_key=st.session_state["api_key"]
-                )
-            
-            # Combine into Full Report
-            report = FullReport(
-                facts=st.session_state["facts"],
-                narrative=narrative,
-                confidence_score=1.0
-            )
-            
-            # Critic Pass - only check AI-generated narrative, not user-verified facts
-            # The narrative is what the AI created; facts are already human-verified
-            with agent_spinner("Critic", "Verifying for hallucinations..."):
-                # Only check executive summary and key takeaways (AI-generated)
-                narrative_text = f"""Executive Summary:
-{report.narrative.executive_summary}
-
-Key Takeaways:
-{chr(10).join(f'- {t}' for t in report.narrative.key_takeaways)}"""
-                
-                # Combine original notes + user-verified facts as the source of truth
-                verified_facts = st.session_state["facts"]
-                source_text = f"""{st.session_state["raw_text_context"]}
-
---- USER-VERIFIED FACTS ---
-Event: {verified_facts.event_title or 'N/A'}
-Date: {verified_facts.date or 'N/A'}
-Venue: {verified_facts.venue or 'N/A'}
-Speaker: {verified_facts.speaker_name or 'N/A'}
-Organizer: {verified_facts.organizer or 'N/A'}
-Attendance: {verified_facts.attendance_count or 'N/A'}
-Mode: {verified_facts.mode or 'N/A'}
-Target Audience: {verified_facts.target_audience or 'N/A'}
-Volunteer Count: {verified_facts.volunteer_count or 'N/A'}
-Student Coordinators: {', '.join(verified_facts.student_coordinators) if verified_facts.student_coordinators else 'N/A'}
-Faculty Coordinators: {', '.join(verified_facts.faculty_coordinators) if verified_facts.faculty_coordinators else 'N/A'}
-Agenda: {verified_facts.agenda or 'N/A'}"""
-                
-                verdict = check_consistency(source_text, narrative_text, api_key=st.session_state["api_key"])
+            report, verdict = run_async(_draft_and_verify(
+                st.session_state["facts"],
+                st.session_state["raw_text_context"],
+                st.session_state["api_key"]
+            ))
             
             # Update confidence score from critic
             report.confidence_score = verdict.confidence
@@ -377,7 +412,6 @@ Agenda: {verified_facts.agenda or 'N/A'}"""
             st.session_state["critic_verdict"] = verdict
             
             # Save to session history
-            from datetime import datetime
             if "report_history" not in st.session_state:
                 st.session_state["report_history"] = []
             st.session_state["report_history"].append({
@@ -385,27 +419,28 @@ Agenda: {verified_facts.agenda or 'N/A'}"""
                 "timestamp": datetime.now().strftime("%H:%M")
             })
             
+            # Raw notes are only needed by the agents - don't keep them for the session
+            st.session_state["raw_text_context"] = ""
             st.session_state["stage"] = "report"
             st.rerun()
         except RateLimitError as e:
             st.error(f"⏳ {e.message}")
             st.info("💡 **Tip:** The free tier allows ~15-20 requests/minute. Wait a moment and try again.")
         except AuthenticationError as e:
-            st.error(f"🔑 {e.message}")
-            st.warning("Your API key appears to be invalid. Please check that you've copied the full key from [Google AI Studio](https://aistudio.google.com/apikey).")
-            if st.button("🔄 Enter a New API Key"):
-                old_key = st.session_state.get("api_key")
-                st.session_state["api_key"] = None
-                st.session_state["stage"] = "input"  # Go back to API gate
-                reset_client(old_key)  # Clear cached invalid client
-                # Use JS to trigger full page refresh for clean state
-                st.markdown('<meta http-equiv="refresh" content="0">', unsafe_allow_html=True)
+            render_auth_error(e)
         except ValueError as e:
             st.error(f"❌ Report generation failed: {e}")
 
 
 # --- STAGE 3: REPORT PREVIEW ---
-elif st.session_state["stage"] == "report":
+def _render_docx(report: FullReport) -> bytes:
+    """Renders the report to DOCX bytes for the download button."""
+    return render_report(report).getvalue()
+
+
+@st.fragment
+def render_report_stage():
+    """Critic verdict, report preview, and DOCX export."""
     st.header("📄 Your Report")
     
     verdict = st.session_state.get("critic_verdict")
@@ -465,26 +500,37 @@ elif st.session_state["stage"] == "report":
     col1, col2 = st.columns(2)
     
     with col1:
-        if st.button("📄 Generate DOCX", use_container_width=True):
-            with st.spinner("Generating DOCX..."):
-                file_stream = render_report(report)
-                st.session_state["docx_stream"] = file_stream
-    
-    with col2:
-        if st.button("🔄 Start Over", use_container_width=True):
-            for key in ["stage", "facts", "final_report", "critic_verdict", "docx_stream", "selected_template"]:
-                if key == "stage":
-                    st.session_state[key] = "input"
-                else:
-                    st.session_state[key] = None
-            st.rerun()
-    
-    # Download button (shown after generation)
-    if st.session_state.get("docx_stream"):
+        # Rendered only when clicked; callable data keeps no DOCX in session state
         st.download_button(
             label="📥 Download DOCX",
-            data=st.session_state["docx_stream"],
+            data=lambda: _render_docx(report),
             file_name=f"{report.facts.event_title or 'event'}_report.docx",
             mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+            on_click="ignore",
             use_container_width=True
         )
+    
+    with col2:
+        if st.button("🔄 Start Over", use_container_width=True):
+            st.session_state.update({
+                "stage": "input",
+                "facts": None,
+                "raw_text_context": "",
+                "final_report": None,
+                "critic_verdict": None,
+                "selected_template": None,
+                "speculative_narrative": None,
+                "speculative_facts": None,
+            })
+            st.rerun()  # Full rerun: the stepper and stage dispatch live outside this fragment
+
+
+# --- STAGE DISPATCH ---
+# Each stage is a fragment: widget interactions rerun only the active stage,
+# while stage transitions call st.rerun() to refresh the whole app
+if st.session_state["stage"] == "input":
+    render_input_stage()
+elif st.session_state["stage"] == "verify":
+    render_verify_stage()
+elif st.session_state["stage"] == "report":
+    render_report_stage()
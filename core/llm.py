@@ -2,33 +2,50 @@
 Gemini LLM Client Wrapper with Retry Logic and Caching.
 
 Provides a singleton client with:
-- Exponential backoff retry for transient failures
+- Exponential backoff retry (with jitter) for transient failures
+- Server-requested retry delays (Retry-After / RetryInfo) honored
 - Streamlit-compatible caching
 - Centralized error handling
 - Rate limit detection (no retry on 429)
+- Concurrency limiting for async calls
+- Per-event-loop async clients, closed when their loop finishes
+- Background client warm-up
 """
 import os
+import math
+import asyncio
+import hashlib
 import logging
+import threading
+import weakref
+from typing import Awaitable, Optional, TypeVar
 from google import genai
-from google.genai.errors import ClientError
+from google.genai.errors import ClientError, ServerError
 from google.api_core import exceptions as google_exceptions
 from dotenv import load_dotenv
 from tenacity import (
     retry,
     stop_after_attempt,
     wait_exponential,
+    wait_random,
     retry_if_exception_type,
     before_sleep_log
 )
 
 load_dotenv()
 
+T = TypeVar("T")
+
 # Configure logging for retry visibility
 logger = logging.getLogger(__name__)
 
 # Default model to use across the application
 DEFAULT_MODEL = "gemini-2.5-flash"
 
+# Maximum number of concurrent in-flight async LLM calls (free-tier friendly)
+# Override with GEMINI_CONCURRENCY for keys with a higher RPM quota
+MAX_CONCURRENT_REQUESTS = max(1, int(os.getenv("GEMINI_CONCURRENCY", "5")))
+
 
 class RateLimitError(Exception):
     """
@@ -81,9 +98,67 @@ def is_auth_error(error: Exception) -> bool:
     return False
 
 
+def extract_retry_after(error: Exception) -> Optional[int]:
+    """
+    Reads how long the server asked us to wait before retrying.
+    
+    Checks the HTTP Retry-After header first, then the RetryInfo detail
+    Gemini includes in 429 bodies (e.g. "retryDelay": "37s").
+    
+    Returns:
+        Whole seconds to wait, or None if the server didn't say
+    """
+    headers = getattr(getattr(error, 'response', None), 'headers', None)
+    if headers is not None:
+        value = str(headers.get("Retry-After") or "")
+        if value.isdigit():
+            return int(value)
+    
+    details = getattr(error, 'details', None)
+    if isinstance(details, dict):
+        for detail in details.get("error", {}).get("details", []):
+            delay = detail.get("retryDelay") if isinstance(detail, dict) else None
+            if isinstance(delay, str) and delay.endswith("s"):
+                try:
+                    return math.ceil(float(delay[:-1]))
+                except ValueError:
+                    continue
+    return None
+
+
+def classify_client_error(error: Exception) -> Exception:
+    """
+    Maps an API error to the typed exception the UI knows how to handle.
+    
+    Args:
+        error: Exception raised by a Gemini call (usually a ClientError)
+    
+    Returns:
+        RateLimitError or AuthenticationError for those failures,
+        otherwise the original error unchanged (callers re-raise it)
+    """
+    if is_rate_limit_error(error):
+        retry_after = extract_retry_after(error)
+        if retry_after is None:
+            return RateLimitError(
+                "API rate limit exceeded. Please wait 1 minute before trying again.",
+                retry_after=60
+            )
+        return RateLimitError(
+            f"API rate limit exceeded. Please wait {retry_after} seconds before trying again.",
+            retry_after=retry_after
+        )
+    if is_auth_error(error):
+        return AuthenticationError(
+            "Invalid API key. Please check your key and try again."
+        )
+    return error
+
+
 # Exceptions that warrant a retry (transient failures)
 # Note: ResourceExhausted (429) is intentionally EXCLUDED - we handle it separately
 RETRYABLE_EXCEPTIONS = (
+    ServerError,                           # 5xx from the google-genai SDK
     google_exceptions.ServiceUnavailable,  # Temporary outage
     google_exceptions.DeadlineExceeded,    # Timeout
     ConnectionError,
@@ -93,7 +168,20 @@ RETRYABLE_EXCEPTIONS = (
 
 # Session-scoped client storage
 # Key: api_key hash -> Client instance (prevents cross-session contamination)
+# Bounded so a stream of distinct (e.g. invalid) keys can't grow it forever
+MAX_CACHED_CLIENTS = 32
 _client_cache = {}
+_client_cache_lock = threading.Lock()
+
+
+def api_key_digest(api_key: str) -> str:
+    """
+    Digest of an API key, for keying per-key registries.
+    
+    Used by the client cache and the rate limiter so that neither keeps
+    extra copies of the key in memory.
+    """
+    return hashlib.blake2b(api_key.encode(), digest_size=16).hexdigest()
 
 
 def get_gemini_client(api_key: str = None):
@@ -103,6 +191,12 @@ def get_gemini_client(api_key: str = None):
     Uses a cache keyed by the API key to avoid recreating clients,
     but each user session has its own key, preventing cross-session leaks.
     
+    The cache is module-level, so it survives Streamlit reruns and each
+    client's HTTP connection pool is reused across calls; call sites should
+    always go through this function rather than constructing clients.
+    It holds at most MAX_CACHED_CLIENTS clients, evicting the least
+    recently used.
+    
     Args:
         api_key: The Gemini API key. If None, falls back to environment variable
                  (only for local development/testing).
@@ -110,21 +204,24 @@ def get_gemini_client(api_key: str = None):
     Raises:
         ValueError: If no API key is provided or found.
     """
-    global _client_cache
-    
     # Resolve API key
     key = api_key or os.getenv("GEMINI_API_KEY")
     if not key:
         raise ValueError("No API key provided. Please enter your Gemini API key.")
     
-    # Return cached client for this key
-    if key in _client_cache:
-        return _client_cache[key]
-    
-    # Create and cache new client
-    client = genai.Client(api_key=key)
-    _client_cache[key] = client
-    return client
+    cache_key = api_key_digest(key)
+    with _client_cache_lock:
+        # Return cached client for this key, marking it most recently used
+        client = _client_cache.pop(cache_key, None)
+        if client is None:
+            client = genai.Client(api_key=key)
+        
+        while len(_client_cache) >= MAX_CACHED_CLIENTS:
+            # Dicts preserve insertion order, so the first key is the least recently used
+            _client_cache.pop(next(iter(_client_cache)))
+        
+        _client_cache[cache_key] = client
+        return client
 
 
 def reset_client(api_key: str = None):
@@ -132,30 +229,66 @@ def reset_client(api_key: str = None):
     Reset the cached client for a specific API key.
     If no key provided, clears all cached clients.
     """
-    global _client_cache
-    if api_key:
-        _client_cache.pop(api_key, None)
-    else:
-        _client_cache.clear()
+    with _client_cache_lock:
+        if api_key:
+            _client_cache.pop(api_key_digest(api_key), None)
+        else:
+            _client_cache.clear()
+
+
+def warm_up_client(api_key: str) -> threading.Thread:
+    """
+    Creates the client for a key and opens its connection in the background.
+    
+    Fetches model metadata rather than generating content, so the TLS
+    handshake is done before the first Auditor call without spending
+    a request from the generation quota. Failures are only logged; an
+    invalid key is reported by the first real call.
+    
+    Returns:
+        The started daemon thread
+    """
+    def _warm_up():
+        try:
+            get_gemini_client(api_key).models.get(model=DEFAULT_MODEL)
+        except Exception as e:
+            logger.debug(f"Client warm-up failed: {e}")
+    
+    thread = threading.Thread(target=_warm_up, name="bean-warmup", daemon=True)
+    thread.start()
+    return thread
 
 
-def create_retry_decorator(max_attempts: int = 3, min_wait: int = 2, max_wait: int = 10):
+def create_retry_decorator(max_attempts: int = 3, min_wait: int = 2, max_wait: int = 10, jitter: float = 1.0):
     """
     Creates a retry decorator with exponential backoff.
     
     Note: Does NOT retry on rate limit (429) errors - those require user to wait.
     
+    Random jitter is added to each wait so that calls which failed together
+    (e.g. during a brief outage) don't all retry at the same instant. If the
+    server sent a Retry-After, the wait is at least that long (capped at
+    max_wait). Async functions are retried with asyncio.sleep, so waiting
+    doesn't block the event loop.
+    
     Args:
         max_attempts: Maximum number of retry attempts
         min_wait: Minimum wait time between retries (seconds)
         max_wait: Maximum wait time between retries (seconds)
+        jitter: Maximum random delay added to each wait (seconds)
     
     Returns:
         A tenacity retry decorator
     """
+    backoff = wait_exponential(multiplier=1, min=min_wait, max=max_wait) + wait_random(0, jitter)
+    
+    def wait(retry_state) -> float:
+        requested = extract_retry_after(retry_state.outcome.exception()) or 0
+        return max(backoff(retry_state), min(requested, max_wait))
+    
     return retry(
         stop=stop_after_attempt(max_attempts),
-        wait=wait_exponential(multiplier=1, min=min_wait, max=max_wait),
+        wait=wait,
         retry=retry_if_exception_type(RETRYABLE_EXCEPTIONS),
         before_sleep=before_sleep_log(logger, logging.WARNING),
         reraise=True
@@ -164,3 +297,101 @@ def create_retry_decorator(max_attempts: int = 3, min_wait: int = 2, max_wait: i
 
 # Pre-configured retry decorator for LLM calls
 llm_retry = create_retry_decorator(max_attempts=3, min_wait=2, max_wait=10)
+
+
+# Per-event-loop semaphores (asyncio primitives must not cross loops,
+# and Streamlit creates a fresh loop for every asyncio.run call)
+_request_semaphores = weakref.WeakKeyDictionary()
+
+
+def get_request_semaphore() -> asyncio.Semaphore:
+    """
+    Returns the semaphore bounding concurrent async LLM calls on the running loop.
+    
+    Async agents acquire this before every request so that callers gathering
+    several calls at once stay within the Gemini RPM limits.
+    
+    Raises:
+        RuntimeError: If called outside of a running event loop.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = _request_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        _request_semaphores[loop] = semaphore
+    return semaphore
+
+
+# Per-event-loop async clients: loop -> {api_key digest: AsyncClient}
+# The async transport pools keep-alive connections bound to the loop that
+# opened them, so an async client must never outlive its asyncio.run call
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_gemini_client(api_key: str = None):
+    """
+    Returns an async Gemini client for the given API key on the running loop.
+    
+    Unlike get_gemini_client, the client is cached per event loop rather than
+    per process: reusing one across asyncio.run calls fails with "Event loop
+    is closed" once a pooled connection from an earlier loop is picked up.
+    Run coroutines that use it through run_async so the client is closed
+    before its loop is.
+    
+    Args:
+        api_key: The Gemini API key. If None, falls back to environment variable
+                 (only for local development/testing).
+    
+    Raises:
+        ValueError: If no API key is provided or found.
+        RuntimeError: If called outside of a running event loop.
+    """
+    key = api_key or os.getenv("GEMINI_API_KEY")
+    if not key:
+        raise ValueError("No API key provided. Please enter your Gemini API key.")
+    
+    loop = asyncio.get_running_loop()
+    clients = _async_clients.setdefault(loop, {})
+    cache_key = api_key_digest(key)
+    client = clients.get(cache_key)
+    if client is None:
+        client = genai.Client(api_key=key).aio
+        clients[cache_key] = client
+    return client
+
+
+async def close_async_clients() -> None:
+    """
+    Closes the async clients created on the running loop.
+    
+    Failures are only logged; a client that can't close cleanly is dropped
+    along with its loop either way.
+    """
+    clients = _async_clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.debug(f"Async client close failed: {e}")
+
+
+def run_async(coro: Awaitable[T]) -> T:
+    """
+    Runs a coroutine on a fresh event loop, like asyncio.run.
+    
+    The async clients the coroutine created are closed before the loop is,
+    so the next call starts with fresh connections on its own loop.
+    
+    Args:
+        coro: Coroutine to run (typically one awaiting the async agents)
+    
+    Returns:
+        The coroutine's result
+    """
+    async def _run():
+        try:
+            return await coro
+        finally:
+            await close_async_clients()
+    
+    return asyncio.run(_run())
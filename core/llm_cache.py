@@ -0,0 +1,96 @@
+"""
+LLM Response Cache - Exact-Match Memoization for Agent Calls.
+
+Avoids repeated Gemini round-trips for identical inputs:
+- SHA-256 cache keys over the call inputs and prompt version
+- Whitespace normalization so re-pasted notes hit the cache
+- Time-based expiry (24 hours by default)
+- Bounded size with oldest-first eviction
+- Returns deep copies so callers can't mutate cached results
+- Thread-safe (speculative drafts write from background threads)
+"""
+import time
+import hashlib
+import threading
+from typing import Optional
+from pydantic import BaseModel
+
+
+# Bump whenever any agent prompt changes so stale responses are not reused
+PROMPT_VERSION = "2"
+
+# Cache limits
+CACHE_TTL_SECONDS = 24 * 60 * 60
+CACHE_MAX_ENTRIES = 256
+
+# Separator that cannot appear in normal note text (ASCII unit separator)
+_KEY_SEPARATOR = "\x1f"
+
+
+# Process-wide response storage
+# Key: SHA-256 hex digest -> (expires_at, response model)
+_response_cache = {}
+_response_cache_lock = threading.Lock()
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalizes insignificant whitespace in user notes.
+    
+    Collapses runs of spaces/tabs, strips each line, and drops blank lines,
+    so the same notes pasted with different wrapping or indentation map to
+    one cache entry. Content (including case and numbers) is left untouched,
+    since a single changed character can change an extracted fact.
+    """
+    lines = (" ".join(line.split()) for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def compute_cache_key(*parts: str) -> str:
+    """
+    Computes a stable SHA-256 cache key for the given input parts.
+    
+    The prompt version is always included so that changing a prompt
+    invalidates every response generated with the old one.
+    """
+    payload = _KEY_SEPARATOR.join((PROMPT_VERSION, *parts))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def get_cached_response(key: str) -> Optional[BaseModel]:
+    """
+    Returns a copy of the cached response for a key, or None on miss/expiry.
+    """
+    with _response_cache_lock:
+        entry = _response_cache.get(key)
+        if entry is None:
+            return None
+        
+        expires_at, response = entry
+        if expires_at < time.monotonic():
+            _response_cache.pop(key, None)
+            return None
+    
+    # Cached models are never mutated, so copying outside the lock is safe
+    return response.model_copy(deep=True)
+
+
+def cache_response(key: str, response: BaseModel) -> None:
+    """
+    Stores a response under a key, evicting the oldest entries when full.
+    """
+    entry = (time.monotonic() + CACHE_TTL_SECONDS, response.model_copy(deep=True))
+    
+    with _response_cache_lock:
+        _response_cache.pop(key, None)
+        while len(_response_cache) >= CACHE_MAX_ENTRIES:
+            # Dicts preserve insertion order, so the first key is the oldest
+            _response_cache.pop(next(iter(_response_cache)), None)
+        
+        _response_cache[key] = entry
+
+
+def clear_response_cache() -> None:
+    """Removes every cached response."""
+    with _response_cache_lock:
+        _response_cache.clear()
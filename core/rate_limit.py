@@ -0,0 +1,128 @@
+"""
+Rate Limiter Module - Proactive Request Pacing.
+
+Paces Gemini calls client-side so bursts wait briefly for capacity
+instead of burning a round-trip on a 429:
+- Token bucket per API key (Gemini quotas are per key)
+- 15 requests/minute by default (free tier, configurable via GEMINI_RPM)
+- Thread-safe blocking acquire for sync calls
+- Loop-friendly acquire for async calls
+- Fails fast with RateLimitError when the wait would be too long
+"""
+import os
+import math
+import time
+import asyncio
+import threading
+from core.llm import RateLimitError, api_key_digest
+
+
+# Gemini free-tier quota
+# Override with GEMINI_RPM for keys on a paid tier
+DEFAULT_REQUESTS_PER_MINUTE = max(1, int(os.getenv("GEMINI_RPM", "15")))
+
+# Longest a caller will wait for a token before giving up
+MAX_WAIT_SECONDS = 30.0
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+    
+    Tokens may go negative: each caller reserves a token up front and then
+    waits out its share of the deficit, so concurrent callers are served in
+    order without polling.
+    """
+    def __init__(self, capacity: int, refill_rate: float):
+        self.capacity = capacity
+        self.refill_rate = refill_rate  # tokens per second
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _reserve(self, max_wait: float) -> float:
+        """Reserves a token and returns how long the caller must wait to use it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_rate)
+            self._updated = now
+            
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            
+            delay = -self._tokens / self.refill_rate
+            if delay > max_wait:
+                # Give the token back - this caller won't be using it
+                self._tokens += 1
+                raise RateLimitError(
+                    "API rate limit exceeded. Please wait 1 minute before trying again.",
+                    retry_after=math.ceil(delay)
+                )
+            return delay
+    
+    def acquire(self, max_wait: float = MAX_WAIT_SECONDS) -> None:
+        """
+        Blocks until a token is available.
+        
+        Raises:
+            RateLimitError: If a token won't be available within max_wait seconds
+        """
+        delay = self._reserve(max_wait)
+        if delay:
+            time.sleep(delay)
+    
+    async def acquire_async(self, max_wait: float = MAX_WAIT_SECONDS) -> None:
+        """
+        Waits for a token without blocking the event loop.
+        
+        Raises:
+            RateLimitError: If a token won't be available within max_wait seconds
+        """
+        delay = self._reserve(max_wait)
+        if delay:
+            await asyncio.sleep(delay)
+
+
+# Process-wide bucket storage
+# Key: api_key hash -> TokenBucket (shared by every session using that key)
+# Bounded so a stream of distinct (e.g. invalid) keys can't grow it forever
+MAX_TRACKED_KEYS = 32
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def get_rate_limiter(api_key: str = None) -> TokenBucket:
+    """
+    Returns the token bucket for the given API key.
+    
+    At most MAX_TRACKED_KEYS buckets are kept, evicting the least recently
+    used; an evicted key starts again with a full bucket.
+    
+    Args:
+        api_key: The Gemini API key. If None, falls back to environment variable
+                 (matching get_gemini_client).
+    """
+    cache_key = api_key_digest(api_key or os.getenv("GEMINI_API_KEY") or "")
+    
+    with _buckets_lock:
+        # Return the existing bucket for this key, marking it most recently used
+        bucket = _buckets.pop(cache_key, None)
+        if bucket is None:
+            bucket = TokenBucket(
+                capacity=DEFAULT_REQUESTS_PER_MINUTE,
+                refill_rate=DEFAULT_REQUESTS_PER_MINUTE / 60
+            )
+        
+        while len(_buckets) >= MAX_TRACKED_KEYS:
+            # Dicts preserve insertion order, so the first key is the least recently used
+            _buckets.pop(next(iter(_buckets)))
+        
+        _buckets[cache_key] = bucket
+        return bucket
+
+
+def reset_rate_limiters() -> None:
+    """Drops all buckets, restoring full capacity for every key."""
+    with _buckets_lock:
+        _buckets.clear()
@@ -1,9 +1,46 @@
-import re
 from io import BytesIO
 from docxtpl import DocxTemplate
+from jinja2 import Environment
 from models.schemas import FullReport
 
 
+# Facts the template iterates over with {% for %}
+_LIST_FIELDS = ("student_coordinators", "faculty_coordinators", "judges", "winners")
+
+# Compiled template parts to keep; there are only a few per .docx file
+MAX_COMPILED_TEMPLATES = 64
+
+
+class _CachingEnvironment(Environment):
+    """
+    Jinja environment that reuses compiled templates for identical sources.
+    
+    docxtpl compiles each XML part of the .docx with from_string on every
+    render. The patched XML (and so the compiled template) is the same
+    each time for a given file, so it is keyed by the source itself: an
+    edited template produces a new source and is compiled afresh.
+    """
+    def __init__(self, **options):
+        super().__init__(**options)
+        self._compiled = {}
+    
+    def from_string(self, source, globals=None, template_class=None):
+        if globals or template_class:
+            return super().from_string(source, globals, template_class)
+        
+        template = self._compiled.get(source)
+        if template is None:
+            template = super().from_string(source)
+            if len(self._compiled) >= MAX_COMPILED_TEMPLATES:
+                self._compiled.clear()
+            self._compiled[source] = template
+        return template
+
+
+# Shared by every render; same default settings docxtpl uses without one
+_jinja_env = _CachingEnvironment()
+
+
 def sanitize_jinja_input(value: str) -> str:
     """
     Escapes Jinja2 control characters to prevent template injection.
@@ -11,12 +48,15 @@ def sanitize_jinja_input(value: str) -> str:
     """
     if not isinstance(value, str):
         return value
-    # Escape Jinja2 delimiters
-    value = re.sub(r'\{\{', '{ {', value)
-    value = re.sub(r'\}\}', '} }', value)
-    value = re.sub(r'\{%', '{ %', value)
-    value = re.sub(r'%\}', '% }', value)
-    return value
+    if "{" not in value and "}" not in value:
+        return value  # Fast path: every delimiter contains a brace
+    # Escape Jinja2 delimiters (plain str.replace; same order as before)
+    return (
+        value.replace("{{", "{ {")
+        .replace("}}", "} }")
+        .replace("{%", "{ %")
+        .replace("%}", "% }")
+    )
 
 
 def sanitize_view_model(report: FullReport) -> dict:
@@ -37,10 +77,9 @@ def sanitize_view_model(report: FullReport) -> dict:
             facts[key] = sanitize_jinja_input(value)
     
     # Ensure lists are not empty for iteration
-    list_fields = ["student_coordinators", "faculty_coordinators", "judges", "winners"]
-    for field in list_fields:
-        if field in facts and not facts[field]:
-             facts[field] = []
+    for field in _LIST_FIELDS:
+        if not facts.get(field):
+            facts[field] = []
 
     if not narrative["key_takeaways"]:
         narrative["key_takeaways"] = ["No specific takeaways recorded."]
@@ -74,7 +113,7 @@ def render_report(report: FullReport, template_path: str = "master_template.docx
     doc = DocxTemplate(template_path)
     context = sanitize_view_model(report)
     
-    doc.render(context)
+    doc.render(context, jinja_env=_jinja_env)
     
     file_stream = BytesIO()
     doc.save(file_stream)
@@ -4,12 +4,13 @@ Template Storage Module - Persistent Event Templates.
 Provides functions to save, load, and manage reusable event templates.
 Templates are stored as JSON files in the templates/ directory.
 """
-import json
 import logging
 import os
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from typing import List, Optional
+from pydantic import ValidationError
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +20,9 @@ from models.schemas import EventTemplate, EventFacts
 # Templates directory path (relative to project root)
 TEMPLATES_DIR = Path(__file__).parent.parent / "templates"
 
+# Single background writer, so queued use-count updates never race each other
+_use_count_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bean-templates")
+
 
 def _ensure_templates_dir():
     """Create templates directory if it doesn't exist."""
@@ -46,8 +50,12 @@ def save_template(template: EventTemplate) -> bool:
     if not template.created_at:
         template.created_at = datetime.now().isoformat()
     
+    # Write to a temp file and swap it in, so an interrupted write
+    # (e.g. a use-count update) can't leave a truncated template behind
     path = _get_template_path(template.id)
-    path.write_text(template.model_dump_json(indent=2))
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(template.model_dump_json(indent=2))
+    os.replace(tmp_path, path)
     return True
 
 
@@ -63,13 +71,14 @@ def load_templates() -> List[EventTemplate]:
     templates = []
     for file in TEMPLATES_DIR.glob("*.json"):
         try:
-            data = json.loads(file.read_text())
-            templates.append(EventTemplate(**data))
-        except json.JSONDecodeError as e:
-            logger.warning(f"Skipping corrupt template {file.name}: JSON decode error - {e}")
+            # Parsed and validated in one pass by pydantic-core
+            templates.append(EventTemplate.model_validate_json(file.read_bytes()))
+        except ValidationError as e:
+            # Raised for corrupt JSON as well as for schema mismatches
+            logger.warning(f"Skipping invalid template {file.name}: {e}")
             continue
         except Exception as e:
-            logger.warning(f"Skipping invalid template {file.name}: {e}")
+            logger.warning(f"Skipping unreadable template {file.name}: {e}")
             continue
     
     # Sort by use count (most popular first)
@@ -92,9 +101,8 @@ def get_template(template_id: str) -> Optional[EventTemplate]:
         return None
     
     try:
-        data = json.loads(path.read_text())
-        return EventTemplate(**data)
-    except (json.JSONDecodeError, Exception):
+        return EventTemplate.model_validate_json(path.read_bytes())
+    except Exception:
         return None
 
 
@@ -116,6 +124,22 @@ def increment_use_count(template_id: str) -> bool:
     return False
 
 
+def schedule_use_count_increment(template_id: str) -> Future:
+    """
+    Queues increment_use_count on a background writer thread.
+    
+    Use counts only order the template selector, so callers on the
+    request path don't need to wait for the disk write.
+    
+    Args:
+        template_id: The template ID to update
+        
+    Returns:
+        Future resolving to increment_use_count's result
+    """
+    return _use_count_executor.submit(increment_use_count, template_id)
+
+
 def delete_template(template_id: str) -> bool:
     """
     Delete a template by ID.
@@ -187,60 +211,67 @@ def create_template_from_facts(
 
 # --- BUILT-IN TEMPLATES ---
 
+# Built once at import; every call would otherwise re-validate five models
+BUILTIN_TEMPLATES = (
+    EventTemplate(
+        id="workshop",
+        name="🛠️ Technical Workshop",
+        description="Hands-on learning session with a speaker/instructor",
+        category="Technical",
+        default_organizer="IEEE RIT Student Branch",
+        default_mode="Offline",
+        default_target_audience="Engineering Students",
+        suggested_agenda="Registration → Welcome → Session 1 → Break → Session 2 → Q&A → Feedback",
+    ),
+    EventTemplate(
+        id="hackathon",
+        name="💻 Hackathon",
+        description="Competitive coding/building event with teams and prizes",
+        category="Competition",
+        default_organizer="IEEE RIT Student Branch",
+        default_mode="Hybrid",
+        default_target_audience="All Engineering Students",
+        suggested_agenda="Inauguration → Problem Statement → Hacking Phase → Judging → Prize Distribution",
+    ),
+    EventTemplate(
+        id="seminar",
+        name="🎓 Guest Seminar",
+        description="Talk or lecture by an industry/academic expert",
+        category="Knowledge",
+        default_organizer="IEEE RIT Student Branch",
+        default_mode="Offline",
+        default_target_audience="Faculty and Students",
+        suggested_agenda="Welcome → Introduction → Keynote → Q&A → Vote of Thanks",
+    ),
+    EventTemplate(
+        id="webinar",
+        name="🌐 Online Webinar",
+        description="Virtual session delivered online",
+        category="Technical",
+        default_organizer="IEEE RIT Student Branch",
+        default_mode="Online",
+        default_target_audience="All IEEE Members",
+        suggested_agenda="Zoom Link → Introduction → Presentation → Live Q&A → Closing",
+    ),
+    EventTemplate(
+        id="competition",
+        name="🏆 Technical Competition",
+        description="Contest with multiple rounds and winners",
+        category="Competition",
+        default_organizer="IEEE RIT Student Branch",
+        default_mode="Offline",
+        default_target_audience="Engineering Students",
+        suggested_agenda="Registration → Round 1 → Round 2 → Finals → Results → Prize Ceremony",
+    ),
+)
+
+
 def get_builtin_templates() -> List[EventTemplate]:
     """
     Return a list of built-in templates for common event types.
     These are always available even if no custom templates exist.
+    
+    The list is new on each call, but the templates themselves are shared
+    module-level instances - treat them as read-only.
     """
-    return [
-        EventTemplate(
-            id="workshop",
-            name="🛠️ Technical Workshop",
-            description="Hands-on learning session with a speaker/instructor",
-            category="Technical",
-            default_organizer="IEEE RIT Student Branch",
-            default_mode="Offline",
-            default_target_audience="Engineering Students",
-            suggested_agenda="Registration → Welcome → Session 1 → Break → Session 2 → Q&A → Feedback",
-        ),
-        EventTemplate(
-            id="hackathon",
-            name="💻 Hackathon",
-            description="Competitive coding/building event with teams and prizes",
-            category="Competition",
-            default_organizer="IEEE RIT Student Branch",
-            default_mode="Hybrid",
-            default_target_audience="All Engineering Students",
-            suggested_agenda="Inauguration → Problem Statement → Hacking Phase → Judging → Prize Distribution",
-        ),
-        EventTemplate(
-            id="seminar",
-            name="🎓 Guest Seminar",
-            description="Talk or lecture by an industry/academic expert",
-            category="Knowledge",
-            default_organizer="IEEE RIT Student Branch",
-            default_mode="Offline",
-            default_target_audience="Faculty and Students",
-            suggested_agenda="Welcome → Introduction → Keynote → Q&A → Vote of Thanks",
-        ),
-        EventTemplate(
-            id="webinar",
-            name="🌐 Online Webinar",
-            description="Virtual session delivered online",
-            category="Technical",
-            default_organizer="IEEE RIT Student Branch",
-            default_mode="Online",
-            default_target_audience="All IEEE Members",
-            suggested_agenda="Zoom Link → Introduction → Presentation → Live Q&A → Closing",
-        ),
-        EventTemplate(
-            id="competition",
-            name="🏆 Technical Competition",
-            description="Contest with multiple rounds and winners",
-            category="Competition",
-            default_organizer="IEEE RIT Student Branch",
-            default_mode="Offline",
-            default_target_audience="Engineering Students",
-            suggested_agenda="Registration → Round 1 → Round 2 → Finals → Results → Prize Ceremony",
-        ),
-    ]
+    return list(BUILTIN_TEMPLATES)
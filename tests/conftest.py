@@ -3,13 +3,16 @@ Pytest fixtures for Bean unit tests.
 Provides mocked Gemini client and sample data to avoid hitting real API.
 """
 import pytest
-from unittest.mock import Mock, patch, MagicMock
-from models.schemas import EventFacts, EventNarrative, FullReport, Winner
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock, AsyncMock
+from models.schemas import CriticVerdict, EventFacts, EventNarrative, FullReport, Winner
 
 
 # --- Sample Data Fixtures ---
+# Session-scoped fixtures are built once and shared, so tests must not mutate
+# them; use model_copy(update=...) to get a modified instance.
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_raw_text():
     """Raw event notes as a user might input."""
     return """
@@ -20,7 +23,7 @@ def sample_raw_text():
     """
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_event_facts():
     """Pre-populated EventFacts object for testing."""
     return EventFacts(
@@ -42,7 +45,19 @@ def sample_event_facts():
     )
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
+def empty_event_facts():
+    """EventFacts with every field left at its default, as for empty notes."""
+    return EventFacts()
+
+
+@pytest.fixture(scope="session")
+def sample_event_facts_json(sample_event_facts):
+    """sample_event_facts serialized once, as the model would return it."""
+    return sample_event_facts.model_dump_json()
+
+
+@pytest.fixture(scope="session")
 def sample_event_narrative():
     """Pre-populated EventNarrative object for testing."""
     return EventNarrative(
@@ -65,6 +80,31 @@ def sample_full_report(sample_event_facts, sample_event_narrative):
     )
 
 
+@pytest.fixture(scope="session")
+def mock_safe_verdict():
+    """Mock response for a safe verdict."""
+    return CriticVerdict(
+        is_safe=True,
+        confidence=0.95,
+        issues=[],
+        reasoning="All facts in the report are supported by the source text."
+    )
+
+
+@pytest.fixture(scope="session")
+def mock_unsafe_verdict():
+    """Mock response for an unsafe verdict with issues."""
+    return CriticVerdict(
+        is_safe=False,
+        confidence=0.85,
+        issues=[
+            "Report mentions 50 attendees but source says 45",
+            "Speaker title 'Professor' not mentioned in source"
+        ],
+        reasoning="Found 2 facts in the report not supported by source."
+    )
+
+
 @pytest.fixture
 def sample_winners():
     """Sample winner data for hackathon-style events."""
@@ -95,41 +135,67 @@ def mock_gemini_client():
         yield mock_client
 
 
-@pytest.fixture
-def mock_auditor_response(sample_event_facts):
+@pytest.fixture(autouse=True)
+def patched_gemini_client(monkeypatch):
+    """
+    Mocked client returned by get_gemini_client in every agent module.
+    
+    Autouse, so those agents can never reach a real client; tests that need
+    it set responses on the client's generate_content calls. The async agents
+    get its .aio namespace from get_async_gemini_client, as with the SDK. Only those
+    calls are mocks (for call_args/assert_called_once); the rest of the
+    client is plain namespaces, which are much cheaper than a MagicMock tree.
+    """
+    client = SimpleNamespace(
+        models=SimpleNamespace(generate_content=MagicMock()),
+        aio=SimpleNamespace(models=SimpleNamespace(
+            generate_content=AsyncMock(),
+            generate_content_stream=AsyncMock()
+        ))
+    )
+    for module in ('core.auditor', 'core.ghostwriter', 'core.critic'):
+        monkeypatch.setattr(f'{module}.get_gemini_client', lambda api_key=None: client)
+    for module in ('core.ghostwriter', 'core.critic'):
+        monkeypatch.setattr(f'{module}.get_async_gemini_client', lambda api_key=None: client.aio)
+    return client
+
+
+def _make_response(parsed=None, text=None):
+    """Lightweight stand-in for a Gemini response (only .parsed and .text are read)."""
+    return SimpleNamespace(parsed=parsed, text=text)
+
+
+@pytest.fixture(scope="session")
+def make_response():
+    """Factory for Gemini response stubs, e.g. make_response(text="invalid json {")."""
+    return _make_response
+
+
+@pytest.fixture(scope="session")
+def mock_auditor_response(sample_event_facts, sample_event_facts_json):
     """Mock response object for auditor calls."""
-    mock_response = Mock()
-    mock_response.parsed = sample_event_facts
-    mock_response.text = sample_event_facts.model_dump_json()
-    return mock_response
+    return _make_response(parsed=sample_event_facts, text=sample_event_facts_json)
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_ghostwriter_response(sample_event_narrative):
     """Mock response object for ghostwriter calls."""
-    mock_response = Mock()
-    mock_response.parsed = sample_event_narrative
-    mock_response.text = sample_event_narrative.model_dump_json()
-    return mock_response
+    return _make_response(parsed=sample_event_narrative, text=sample_event_narrative.model_dump_json())
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_critic_safe_response():
     """Mock response for critic when report is safe."""
-    mock_response = Mock()
-    mock_response.text = "SAFE"
-    return mock_response
+    return _make_response(text="SAFE")
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_critic_issues_response():
     """Mock response for critic when hallucinations are found."""
-    mock_response = Mock()
-    mock_response.text = """
+    return _make_response(text="""
     - The report mentions 50 attendees but source says 45
     - Speaker title "Professor" not mentioned in source
-    """
-    return mock_response
+    """)
 
 
 # --- Environment Fixtures ---
@@ -138,3 +204,20 @@ def mock_critic_issues_response():
 def mock_env_api_key(monkeypatch):
     """Automatically set a fake API key for all tests."""
     monkeypatch.setenv("GEMINI_API_KEY", "test-api-key-12345")
+
+
+@pytest.fixture(autouse=True)
+def reset_rate_limiters():
+    """Give every test a full token bucket so pacing never sleeps."""
+    from core.rate_limit import reset_rate_limiters
+    reset_rate_limiters()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def clear_llm_response_cache():
+    """Start every test with an empty response cache so mocks are always hit."""
+    from core.llm_cache import clear_response_cache
+    clear_response_cache()
+    yield
+    clear_response_cache()
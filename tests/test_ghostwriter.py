@@ -2,10 +2,10 @@
 Unit tests for the Ghostwriter (Narrative Generation) module.
 Tests cover: valid narrative generation, minimal facts, self-correction, and prompt security.
 """
+import asyncio
 import pytest
-from unittest.mock import patch, Mock, MagicMock
 
-from core.ghostwriter import generate_narrative
+from core.ghostwriter import generate_narrative, agenerate_narrative
 from models.schemas import EventFacts, EventNarrative
 
 
@@ -13,127 +13,100 @@ class TestGhostwriterGeneration:
     """Tests for the generate_narrative function."""
     
     def test_generate_narrative_valid_input(
-        self, sample_event_facts, sample_raw_text, mock_ghostwriter_response
+        self, patched_gemini_client, sample_event_facts, sample_raw_text, mock_ghostwriter_response
     ):
         """Test that valid facts produce a proper EventNarrative."""
-        with patch('core.ghostwriter.get_gemini_client') as mock_get_client:
-            mock_client = MagicMock()
-            mock_client.models.generate_content.return_value = mock_ghostwriter_response
-            mock_get_client.return_value = mock_client
-            
-            result = generate_narrative(sample_event_facts, sample_raw_text)
-            
-            assert isinstance(result, EventNarrative)
-            assert result.executive_summary is not None
-            assert len(result.executive_summary) > 0
+        patched_gemini_client.models.generate_content.return_value = mock_ghostwriter_response
+        
+        result = generate_narrative(sample_event_facts, sample_raw_text)
+        
+        assert isinstance(result, EventNarrative)
+        assert result.executive_summary is not None
+        assert len(result.executive_summary) > 0
     
     def test_generate_narrative_returns_key_takeaways(
-        self, sample_event_facts, sample_raw_text, mock_ghostwriter_response
+        self, patched_gemini_client, sample_event_facts, sample_raw_text, mock_ghostwriter_response
     ):
         """Test that key_takeaways list is populated."""
-        with patch('core.ghostwriter.get_gemini_client') as mock_get_client:
-            mock_client = MagicMock()
-            mock_client.models.generate_content.return_value = mock_ghostwriter_response
-            mock_get_client.return_value = mock_client
-            
-            result = generate_narrative(sample_event_facts, sample_raw_text)
-            
-            assert isinstance(result.key_takeaways, list)
-            assert len(result.key_takeaways) > 0
+        patched_gemini_client.models.generate_content.return_value = mock_ghostwriter_response
+        
+        result = generate_narrative(sample_event_facts, sample_raw_text)
+        
+        assert isinstance(result.key_takeaways, list)
+        assert len(result.key_takeaways) > 0
     
     def test_generate_narrative_calls_with_correct_temperature(
-        self, sample_event_facts, sample_raw_text, mock_ghostwriter_response
+        self, patched_gemini_client, sample_event_facts, sample_raw_text, mock_ghostwriter_response
     ):
         """Verify Gemini is called with temperature 0.3 (creative but controlled)."""
-        with patch('core.ghostwriter.get_gemini_client') as mock_get_client:
-            mock_client = MagicMock()
-            mock_client.models.generate_content.return_value = mock_ghostwriter_response
-            mock_get_client.return_value = mock_client
-            
-            generate_narrative(sample_event_facts, sample_raw_text)
-            
-            call_args = mock_client.models.generate_content.call_args
-            config = call_args.kwargs.get('config', {})
-            
-            assert config.get('temperature') == 0.3
-            assert config.get('response_schema') == EventNarrative
+        patched_gemini_client.models.generate_content.return_value = mock_ghostwriter_response
+        
+        generate_narrative(sample_event_facts, sample_raw_text)
+        
+        call_args = patched_gemini_client.models.generate_content.call_args
+        config = call_args.kwargs.get('config', {})
+        
+        assert config.get('temperature') == 0.3
+        assert config.get('response_schema') == EventNarrative
     
-    def test_generate_narrative_minimal_facts(self, sample_raw_text, mock_ghostwriter_response):
+    def test_generate_narrative_minimal_facts(self, patched_gemini_client, sample_raw_text, mock_ghostwriter_response):
         """Test with minimal/sparse facts still produces valid output."""
         minimal_facts = EventFacts(
             event_title="Test Event"
             # All other fields are None/default
         )
         
-        with patch('core.ghostwriter.get_gemini_client') as mock_get_client:
-            mock_client = MagicMock()
-            mock_client.models.generate_content.return_value = mock_ghostwriter_response
-            mock_get_client.return_value = mock_client
-            
-            result = generate_narrative(minimal_facts, sample_raw_text)
-            
-            assert isinstance(result, EventNarrative)
+        patched_gemini_client.models.generate_content.return_value = mock_ghostwriter_response
+        
+        result = generate_narrative(minimal_facts, sample_raw_text)
+        
+        assert isinstance(result, EventNarrative)
 
 
 class TestGhostwriterSelfCorrection:
     """Tests for the self-correction fallback."""
     
     def test_self_correction_on_none_parsed(
-        self, sample_event_facts, sample_raw_text, sample_event_narrative
+        self, patched_gemini_client, sample_event_facts, sample_raw_text, sample_event_narrative, make_response
     ):
         """Test that manual parsing is attempted when response.parsed is None."""
-        with patch('core.ghostwriter.get_gemini_client') as mock_get_client:
-            mock_response = Mock()
-            mock_response.parsed = None
-            mock_response.text = sample_event_narrative.model_dump_json()
-            
-            mock_client = MagicMock()
-            mock_client.models.generate_content.return_value = mock_response
-            mock_get_client.return_value = mock_client
-            
-            result = generate_narrative(sample_event_facts, sample_raw_text)
-            
-            assert isinstance(result, EventNarrative)
+        mock_response = make_response(text=sample_event_narrative.model_dump_json())
+        patched_gemini_client.models.generate_content.return_value = mock_response
+        
+        result = generate_narrative(sample_event_facts, sample_raw_text)
+        
+        assert isinstance(result, EventNarrative)
     
-    def test_raises_after_max_retries(self, sample_event_facts, sample_raw_text):
+    def test_raises_after_max_retries(self, patched_gemini_client, sample_event_facts, sample_raw_text, make_response):
         """Test that ValueError is raised when parsing fails."""
-        with patch('core.ghostwriter.get_gemini_client') as mock_get_client:
-            mock_response = Mock()
-            mock_response.parsed = None
-            mock_response.text = "invalid json {"
-            
-            mock_client = MagicMock()
-            mock_client.models.generate_content.return_value = mock_response
-            mock_get_client.return_value = mock_client
-            
-            with pytest.raises(ValueError, match="Failed to parse response"):
-                generate_narrative(sample_event_facts, sample_raw_text)
+        mock_response = make_response(text="invalid json {")
+        patched_gemini_client.models.generate_content.return_value = mock_response
+        
+        with pytest.raises(ValueError, match="Failed to parse response"):
+            generate_narrative(sample_event_facts, sample_raw_text)
 
 
 class TestGhostwriterPromptSecurity:
     """Tests for prompt construction and security."""
     
     def test_prompt_uses_xml_delimiters(
-        self, sample_event_facts, sample_raw_text, mock_ghostwriter_response
+        self, patched_gemini_client, sample_event_facts, sample_raw_text, mock_ghostwriter_response
     ):
         """Verify the prompt uses XML delimiters for injection protection."""
-        with patch('core.ghostwriter.get_gemini_client') as mock_get_client:
-            mock_client = MagicMock()
-            mock_client.models.generate_content.return_value = mock_ghostwriter_response
-            mock_get_client.return_value = mock_client
-            
-            generate_narrative(sample_event_facts, sample_raw_text)
-            
-            call_args = mock_client.models.generate_content.call_args
-            prompt = str(call_args.kwargs.get('contents', ''))
-            
-            # Check for XML delimiters
-            assert "<VERIFIED_FACTS>" in prompt
-            assert "</VERIFIED_FACTS>" in prompt
-            assert "<STYLE_CONTEXT>" in prompt
+        patched_gemini_client.models.generate_content.return_value = mock_ghostwriter_response
+        
+        generate_narrative(sample_event_facts, sample_raw_text)
+        
+        call_args = patched_gemini_client.models.generate_content.call_args
+        prompt = str(call_args.kwargs.get('contents', ''))
+        
+        # Check for XML delimiters
+        assert "<VERIFIED_FACTS>" in prompt
+        assert "</VERIFIED_FACTS>" in prompt
+        assert "<STYLE_CONTEXT>" in prompt
     
     def test_facts_excludes_none_values(
-        self, sample_raw_text, mock_ghostwriter_response
+        self, patched_gemini_client, sample_raw_text, mock_ghostwriter_response
     ):
         """Test that None values are excluded from the facts dict sent to LLM."""
         facts = EventFacts(
@@ -142,13 +115,81 @@ class TestGhostwriterPromptSecurity:
             attendance_count=None
         )
         
-        with patch('core.ghostwriter.get_gemini_client') as mock_get_client:
-            mock_client = MagicMock()
-            mock_client.models.generate_content.return_value = mock_ghostwriter_response
-            mock_get_client.return_value = mock_client
-            
-            generate_narrative(facts, sample_raw_text)
-            
-            # The function uses model_dump(exclude_none=True)
-            # We verify by checking the call was made without error
-            mock_client.models.generate_content.assert_called_once()
+        patched_gemini_client.models.generate_content.return_value = mock_ghostwriter_response
+        
+        generate_narrative(facts, sample_raw_text)
+        
+        # The function uses model_dump(exclude_none=True)
+        # We verify by checking the call was made without error
+        patched_gemini_client.models.generate_content.assert_called_once()
+    
+    def test_facts_are_sent_as_json(
+        self, patched_gemini_client, sample_raw_text, mock_ghostwriter_response
+    ):
+        """Test that facts reach the prompt as JSON rather than a Python dict repr."""
+        facts = EventFacts(event_title="Test", judges=["Dr. Rao"])
+        
+        patched_gemini_client.models.generate_content.return_value = mock_ghostwriter_response
+        
+        generate_narrative(facts, sample_raw_text)
+        
+        prompt = patched_gemini_client.models.generate_content.call_args.kwargs['contents']
+        assert '"event_title":"Test"' in prompt
+        assert '"judges":["Dr. Rao"]' in prompt
+        assert "'event_title'" not in prompt
+    
+    def test_long_style_context_is_truncated(self, patched_gemini_client, sample_event_facts, mock_ghostwriter_response):
+        """Test that very long notes are cut at a line break before the cap."""
+        from core.ghostwriter import MAX_STYLE_CONTEXT_CHARS
+        
+        line = "x" * 99 + "\n"
+        notes = line * (MAX_STYLE_CONTEXT_CHARS // 100 + 10)
+        
+        patched_gemini_client.models.generate_content.return_value = mock_ghostwriter_response
+        
+        generate_narrative(sample_event_facts, notes)
+        
+        prompt = patched_gemini_client.models.generate_content.call_args.kwargs['contents']
+        context = prompt.split("<STYLE_CONTEXT>\n")[1].split("\n</STYLE_CONTEXT>")[0]
+        assert len(context) <= MAX_STYLE_CONTEXT_CHARS
+        assert context.endswith("x")
+        assert notes.startswith(context)
+
+
+class TestGhostwriterAsync:
+    """Tests for the async generate_narrative variant."""
+    
+    def test_agenerate_narrative_uses_async_client(
+        self, patched_gemini_client, sample_event_facts, sample_raw_text, mock_ghostwriter_response
+    ):
+        """Test that the async variant awaits the SDK's async client."""
+        patched_gemini_client.aio.models.generate_content.return_value = mock_ghostwriter_response
+        
+        result = asyncio.run(agenerate_narrative(sample_event_facts, sample_raw_text))
+        
+        assert isinstance(result, EventNarrative)
+        patched_gemini_client.aio.models.generate_content.assert_awaited_once()
+        patched_gemini_client.models.generate_content.assert_not_called()
+        
+        config = patched_gemini_client.aio.models.generate_content.call_args.kwargs.get('config', {})
+        assert config.get('temperature') == 0.3
+    
+    def test_agenerate_narrative_streams_partial_summary(self, patched_gemini_client, sample_event_facts, sample_raw_text, make_response):
+        """Test that on_summary receives the growing executive summary while streaming."""
+        chunks = ['{"executive_summary": "The IEEE', ' branch hosted', ' a workshop.", "key_takeaways": ["ML"]}']
+        
+        async def stream():
+            for text in chunks:
+                yield make_response(text=text)
+        
+        patched_gemini_client.aio.models.generate_content_stream.return_value = stream()
+        
+        summaries = []
+        result = asyncio.run(agenerate_narrative(
+            sample_event_facts, sample_raw_text, on_summary=summaries.append
+        ))
+        
+        assert result.executive_summary == "The IEEE branch hosted a workshop."
+        assert result.key_takeaways == ["ML"]
+        assert summaries == ["The IEEE", "The IEEE branch hosted", "The IEEE branch hosted a workshop."]
+        patched_gemini_client.aio.models.generate_content.assert_not_called()
@@ -1,42 +1,15 @@
 """
 Unit tests for the UI Handlers module.
-Tests cover: text hashing, caching behavior, and audio processing.
+Tests cover: caching behavior, audio processing, and speculative drafting.
 """
+import asyncio
 import pytest
-import hashlib
+from concurrent.futures import Future
 from unittest.mock import patch, MagicMock
 from io import BytesIO
 
-from ui.handlers import _compute_text_hash, handle_text_process
-from models.schemas import EventFacts
-
-
-class TestTextHashing:
-    """Tests for text hash computation."""
-    
-    def test_compute_text_hash_returns_md5(self):
-        """Test that hash is a valid MD5 hex digest."""
-        text = "Test event notes"
-        result = _compute_text_hash(text)
-        
-        # MD5 hex digest is 32 characters
-        assert len(result) == 32
-        assert result == hashlib.md5(text.encode()).hexdigest()
-    
-    def test_compute_text_hash_is_deterministic(self):
-        """Test that same text produces same hash."""
-        text = "Same text across multiple calls"
-        hash1 = _compute_text_hash(text)
-        hash2 = _compute_text_hash(text)
-        
-        assert hash1 == hash2
-    
-    def test_compute_text_hash_differs_for_different_text(self):
-        """Test that different texts produce different hashes."""
-        hash1 = _compute_text_hash("First text")
-        hash2 = _compute_text_hash("Second text")
-        
-        assert hash1 != hash2
+from ui.handlers import handle_text_process
+from models.schemas import EventFacts, EventNarrative
 
 
 class TestHandleTextProcess:
@@ -76,13 +49,21 @@ class TestHandleTextProcess:
             handle_text_process("New notes for extraction", "test-api-key")
         
         mock_extract_facts.assert_called_once()
+    
+    def test_handle_text_process_reuses_cache_for_whitespace_variants(self, mock_extract_facts, clear_cache):
+        """Test that re-pasted notes with different wrapping hit the cache."""
+        with patch('ui.handlers.st'):
+            handle_text_process("Workshop on ML.\n45 students.", "test-api-key")
+            handle_text_process("  Workshop on ML.\n\n45   students.  ", "test-api-key")
+        
+        mock_extract_facts.assert_called_once()
 
 
 class TestHandleAudioProcess:
     """Tests for audio processing handler."""
     
     @pytest.fixture
-    def mock_gemini_client(self):
+    def mock_gemini_client(self, monkeypatch):
         """Mock the Gemini client for audio processing."""
         mock_response = MagicMock()
         mock_response.parsed = EventFacts(
@@ -93,8 +74,11 @@ class TestHandleAudioProcess:
         mock_client = MagicMock()
         mock_client.models.generate_content.return_value = mock_response
         
-        with patch('ui.handlers.get_gemini_client', return_value=mock_client):
-            yield mock_client
+        from ui.handlers import _cached_extract_audio_facts
+        _cached_extract_audio_facts.clear()
+        
+        monkeypatch.setattr('ui.handlers.get_gemini_client', lambda api_key=None: mock_client)
+        return mock_client
     
     def test_handle_audio_process_reads_audio_bytes(self, mock_gemini_client):
         """Test that audio handler reads bytes from file."""
@@ -120,3 +104,107 @@ class TestHandleAudioProcess:
         
         # The call should include audio/wav mime type
         mock_gemini_client.models.generate_content.assert_called_once()
+    
+    def test_handle_audio_process_reuses_cache_for_same_recording(self, mock_gemini_client):
+        """Test that processing the same recording twice calls the API once."""
+        from ui.handlers import handle_audio_process
+        
+        first = handle_audio_process(BytesIO(b"same recording"), "test-api-key")
+        second = handle_audio_process(BytesIO(b"same recording"), "test-api-key")
+        
+        assert first == second
+        assert mock_gemini_client.models.generate_content.call_count == 1
+
+
+class TestSpeculativeNarrative:
+    """Tests for reusing a Ghostwriter draft started before fact verification."""
+    
+    @pytest.fixture
+    def narrative(self):
+        return EventNarrative(executive_summary="Summary", key_takeaways=["Point"])
+    
+    @pytest.fixture
+    def completed_future(self, narrative):
+        future = Future()
+        future.set_result(narrative)
+        return future
+    
+    def test_facts_equivalent_ignores_empty_value_representation(self):
+        """Test that Smart Form round-trips ("" and 0 for missing values) still match."""
+        from ui.handlers import facts_equivalent
+        
+        extracted = EventFacts(event_title="Workshop", venue=None, attendance_count=None)
+        confirmed = EventFacts(event_title="Workshop", venue="", attendance_count=0)
+        
+        assert facts_equivalent(extracted, confirmed)
+    
+    def test_facts_equivalent_detects_edits(self):
+        """Test that a changed value is not treated as equivalent."""
+        from ui.handlers import facts_equivalent
+        
+        assert not facts_equivalent(
+            EventFacts(attendance_count=45),
+            EventFacts(attendance_count=54)
+        )
+    
+    def test_resolve_reuses_draft_for_unchanged_facts(self, completed_future, narrative):
+        """Test that the speculative narrative is returned when facts weren't edited."""
+        from ui.handlers import resolve_speculative_narrative
+        
+        facts = EventFacts(event_title="Workshop")
+        result = asyncio.run(resolve_speculative_narrative(completed_future, facts, facts))
+        
+        assert result == narrative
+    
+    def test_resolve_discards_draft_for_edited_facts(self, completed_future):
+        """Test that edits force a fresh Ghostwriter call."""
+        from ui.handlers import resolve_speculative_narrative
+        
+        result = asyncio.run(resolve_speculative_narrative(
+            completed_future,
+            EventFacts(event_title="Workshop"),
+            EventFacts(event_title="Hackathon")
+        ))
+        
+        assert result is None
+    
+    def test_resolve_discards_failed_draft(self):
+        """Test that a speculative call that raised falls back to a fresh call."""
+        from ui.handlers import resolve_speculative_narrative
+        
+        future = Future()
+        future.set_exception(ValueError("LLM returned empty response"))
+        facts = EventFacts(event_title="Workshop")
+        
+        assert asyncio.run(resolve_speculative_narrative(future, facts, facts)) is None
+    
+    def test_speculative_draft_runs_critic_on_narrative(self, narrative):
+        """Test that the background pass verifies its draft so the verdict gets cached."""
+        from ui.handlers import _draft_speculatively
+        
+        facts = EventFacts(event_title="Workshop")
+        with patch('ui.handlers.generate_narrative', return_value=narrative), \
+             patch('ui.handlers.check_consistency') as mock_check:
+            result = _draft_speculatively(facts, "notes", "test-api-key")
+        
+        assert result == narrative
+        source_text, report_text = mock_check.call_args.args
+        assert source_text.startswith("notes")
+        assert "Summary" in report_text
+    
+    def test_speculative_draft_survives_critic_failure(self, narrative):
+        """Test that a failed Critic pass still returns the usable draft."""
+        from ui.handlers import _draft_speculatively
+        
+        with patch('ui.handlers.generate_narrative', return_value=narrative), \
+             patch('ui.handlers.check_consistency', side_effect=ValueError("boom")):
+            result = _draft_speculatively(EventFacts(), "notes", "test-api-key")
+        
+        assert result == narrative
+    
+    def test_resolve_without_speculation_returns_none(self):
+        """Test that no speculation in session state means a fresh call."""
+        from ui.handlers import resolve_speculative_narrative
+        
+        facts = EventFacts()
+        assert asyncio.run(resolve_speculative_narrative(None, None, facts)) is None
@@ -1,13 +1,22 @@
 """
 Unit tests for the LLM module.
-Tests cover: client management, error handling, and rate limiting.
+Tests cover: client management, warm-up, error handling, and rate limiting.
 """
+import asyncio
+import json
+import threading
 import pytest
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest.mock import patch, MagicMock, PropertyMock
+from google import genai
+from google.genai import types
 
 from core.llm import (
     get_gemini_client, reset_client, RateLimitError, AuthenticationError,
-    is_rate_limit_error, is_auth_error, DEFAULT_MODEL
+    is_rate_limit_error, is_auth_error, get_request_semaphore, warm_up_client,
+    create_retry_decorator, classify_client_error, extract_retry_after, DEFAULT_MODEL,
+    get_async_gemini_client, run_async
 )
 
 
@@ -98,6 +107,68 @@ class TestErrorDetection:
         assert result is False or result is True  # Accept either for this mock scenario
 
 
+class TestClassifyClientError:
+    """Tests for mapping API errors to typed exceptions."""
+    
+    def test_rate_limit_becomes_rate_limit_error(self):
+        """Test that a 429 maps to RateLimitError with the standard wait."""
+        from google.genai.errors import ClientError
+        
+        error = classify_client_error(ClientError(429, {"error": {"message": "quota"}}))
+        
+        assert isinstance(error, RateLimitError)
+        assert error.retry_after == 60
+    
+    def test_invalid_key_becomes_authentication_error(self):
+        """Test that an invalid API key maps to AuthenticationError."""
+        from google.genai.errors import ClientError
+        
+        error = classify_client_error(
+            ClientError(400, {"error": {"message": "API key not valid"}})
+        )
+        
+        assert isinstance(error, AuthenticationError)
+    
+    def test_other_errors_are_returned_unchanged(self):
+        """Test that unrelated client errors pass through for re-raising."""
+        from google.genai.errors import ClientError
+        
+        original = ClientError(404, {"error": {"message": "model not found"}})
+        
+        assert classify_client_error(original) is original
+    
+    def test_rate_limit_uses_server_retry_delay(self):
+        """Test that Gemini's RetryInfo delay replaces the default wait."""
+        from google.genai.errors import ClientError
+        
+        body = {"error": {"message": "quota", "details": [
+            {"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": "36.4s"}
+        ]}}
+        error = classify_client_error(ClientError(429, body))
+        
+        assert error.retry_after == 37
+        assert "37 seconds" in error.message
+
+
+class TestExtractRetryAfter:
+    """Tests for reading server-requested retry delays."""
+    
+    def test_reads_retry_after_header(self):
+        """Test that a numeric Retry-After header is used."""
+        from google.genai.errors import ServerError
+        
+        response = MagicMock(headers={"Retry-After": "5"})
+        
+        assert extract_retry_after(ServerError(503, {}, response)) == 5
+    
+    def test_missing_delay_returns_none(self):
+        """Test that errors without a delay return None."""
+        from google.genai.errors import ServerError
+        
+        assert extract_retry_after(ServerError(503, {"error": {"message": "unavailable"}})) is None
+        assert extract_retry_after(ValueError("boom")) is None
+
+
 class TestClientManagement:
     """Tests for Gemini client caching and management."""
     
@@ -140,6 +211,113 @@ class TestClientManagement:
             
             # Should create twice after reset
             assert MockClient.call_count == 2
+    
+    def test_client_cache_does_not_store_raw_keys(self):
+        """Test that clients are cached under a digest, not the API key itself."""
+        from core import llm
+        
+        with patch('core.llm.genai.Client'):
+            get_gemini_client("test-key-secret")
+        
+        assert "test-key-secret" not in llm._client_cache
+        reset_client("test-key-secret")
+        assert llm.api_key_digest("test-key-secret") not in llm._client_cache
+    
+    def test_client_cache_evicts_least_recently_used(self):
+        """Test that the cache stays bounded and keeps recently used clients."""
+        with patch('core.llm.genai.Client', side_effect=lambda api_key: MagicMock()), \
+             patch('core.llm.MAX_CACHED_CLIENTS', 2):
+            reset_client()
+            first = get_gemini_client("key-a")
+            get_gemini_client("key-b")
+            get_gemini_client("key-a")  # Mark key-a as recently used
+            second = get_gemini_client("key-b")
+            get_gemini_client("key-c")  # Evicts key-a
+            
+            assert get_gemini_client("key-b") is second
+            assert get_gemini_client("key-a") is not first
+    
+    def test_warm_up_client_caches_client_and_fetches_model(self):
+        """Test that warm-up leaves a connected client in the cache."""
+        with patch('core.llm.genai.Client') as MockClient:
+            mock_instance = MagicMock()
+            MockClient.return_value = mock_instance
+            reset_client("test-key-warm")
+            
+            warm_up_client("test-key-warm").join(timeout=5)
+            
+            mock_instance.models.get.assert_called_once_with(model=DEFAULT_MODEL)
+            mock_instance.models.generate_content.assert_not_called()
+            assert get_gemini_client("test-key-warm") is mock_instance
+            assert MockClient.call_count == 1
+    
+    def test_warm_up_client_swallows_errors(self):
+        """Test that a failed warm-up doesn't raise in the background thread."""
+        with patch('core.llm.genai.Client') as MockClient:
+            MockClient.return_value.models.get.side_effect = ConnectionError("offline")
+            reset_client("test-key-warm-fail")
+            
+            with patch('threading.excepthook') as mock_hook:
+                warm_up_client("test-key-warm-fail").join(timeout=5)
+            
+            mock_hook.assert_not_called()
+
+
+class TestRetryDecorator:
+    """Tests for the transient-failure retry policy."""
+    
+    def test_retry_wait_uses_backoff_with_jitter(self):
+        """Test that waits stay within backoff bounds but aren't identical."""
+        decorated = create_retry_decorator(min_wait=2, max_wait=10, jitter=1.0)(lambda: None)
+        retry_state = MagicMock(attempt_number=1)
+        
+        waits = [decorated.retry.wait(retry_state) for _ in range(50)]
+        
+        assert all(2 <= w <= 3 for w in waits)
+        assert len(set(waits)) > 1
+    
+    def test_retry_retries_transient_errors(self):
+        """Test that connection errors are retried until success."""
+        attempts = []
+        
+        @create_retry_decorator(max_attempts=3, min_wait=0, max_wait=0, jitter=0)
+        def flaky():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise ConnectionError("reset")
+            return "ok"
+        
+        assert flaky() == "ok"
+        assert len(attempts) == 3
+    
+    def test_retry_retries_sdk_server_errors(self):
+        """Test that 5xx errors raised by google-genai are treated as transient."""
+        from google.genai.errors import ServerError
+        
+        attempts = []
+        
+        @create_retry_decorator(max_attempts=2, min_wait=0, max_wait=0, jitter=0)
+        def unavailable():
+            attempts.append(1)
+            if len(attempts) < 2:
+                raise ServerError(503, {"error": {"message": "overloaded"}})
+            return "ok"
+        
+        assert unavailable() == "ok"
+        assert len(attempts) == 2
+    
+    def test_retry_wait_honors_retry_after_up_to_max(self):
+        """Test that a server-requested delay lengthens the wait, capped at max_wait."""
+        from google.genai.errors import ServerError
+        
+        decorated = create_retry_decorator(min_wait=2, max_wait=10, jitter=0)(lambda: None)
+        
+        def state_for(seconds):
+            error = ServerError(503, {}, MagicMock(headers={"Retry-After": seconds}))
+            return MagicMock(attempt_number=1, **{"outcome.exception.return_value": error})
+        
+        assert decorated.retry.wait(state_for("7")) == 7
+        assert decorated.retry.wait(state_for("120")) == 10
 
 
 class TestDefaultModel:
@@ -150,3 +328,112 @@ class TestDefaultModel:
         assert DEFAULT_MODEL is not None
         assert isinstance(DEFAULT_MODEL, str)
         assert "gemini" in DEFAULT_MODEL.lower()
+
+
+class TestRequestSemaphore:
+    """Tests for the async concurrency limiter."""
+    
+    def test_semaphore_reused_within_loop(self):
+        """Test that the same loop always gets the same semaphore."""
+        async def grab_twice():
+            return get_request_semaphore(), get_request_semaphore()
+        
+        first, second = asyncio.run(grab_twice())
+        assert first is second
+    
+    def test_semaphore_is_per_loop(self):
+        """Test that each event loop gets its own semaphore."""
+        async def grab():
+            return get_request_semaphore()
+        
+        assert asyncio.run(grab()) is not asyncio.run(grab())
+    
+    def test_semaphore_uses_configured_limit(self):
+        """Test that the GEMINI_CONCURRENCY limit sizes new semaphores."""
+        async def grab():
+            return get_request_semaphore()
+        
+        with patch('core.llm.MAX_CONCURRENT_REQUESTS', 2):
+            semaphore = asyncio.run(grab())
+        
+        assert semaphore._value == 2
+
+
+class _StubGeminiHandler(BaseHTTPRequestHandler):
+    """Answers every generateContent call with "hi", keeping the connection alive."""
+    
+    protocol_version = "HTTP/1.1"
+    
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = json.dumps({
+            "candidates": [{"content": {"role": "model", "parts": [{"text": "hi"}]}}]
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_gemini_server():
+    """Real SDK clients pointed at a local keep-alive server instead of Gemini."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubGeminiHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    client_class = partial(genai.Client, http_options=types.HttpOptions(base_url=base_url))
+    with patch('core.llm.genai.Client', client_class):
+        yield
+    server.shutdown()
+    server.server_close()
+
+
+class TestAsyncClient:
+    """Tests for the per-event-loop async client."""
+    
+    @staticmethod
+    async def generate():
+        client = get_async_gemini_client("test-api-key")
+        response = await client.models.generate_content(model=DEFAULT_MODEL, contents="x")
+        return response.text
+    
+    def test_async_client_reused_within_loop(self):
+        """Test that the same loop and key always get the same client."""
+        async def grab_twice():
+            return get_async_gemini_client("test-api-key"), get_async_gemini_client("test-api-key")
+        
+        with patch('core.llm.genai.Client'):
+            first, second = asyncio.run(grab_twice())
+        assert first is second
+    
+    def test_async_client_survives_repeated_asyncio_run(self, stub_gemini_server):
+        """Test that a second asyncio.run doesn't reuse the first loop's connections."""
+        assert asyncio.run(self.generate()) == "hi"
+        assert asyncio.run(self.generate()) == "hi"
+    
+    def test_run_async_closes_clients_with_the_loop(self, stub_gemini_server):
+        """Test that run_async closes the loop's clients before the loop shuts down."""
+        async def generate_and_keep_client():
+            text = await self.generate()
+            return text, get_async_gemini_client("test-api-key")
+        
+        text, client = run_async(generate_and_keep_client())
+        
+        assert text == "hi"
+        assert client._api_client._async_httpx_client.is_closed
+        assert run_async(self.generate()) == "hi"
+    
+    def test_async_client_requires_api_key(self, monkeypatch):
+        """Test that a missing key is reported like get_gemini_client does."""
+        monkeypatch.delenv("GEMINI_API_KEY")
+        
+        async def grab():
+            return get_async_gemini_client()
+        
+        with pytest.raises(ValueError):
+            asyncio.run(grab())
@@ -0,0 +1,186 @@
+"""
+Unit tests for the LLM response cache module.
+Tests cover: cache key computation, hits/misses, expiry, and eviction.
+"""
+import hashlib
+import threading
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from core import llm_cache
+from core.llm_cache import (
+    compute_cache_key, get_cached_response, cache_response, clear_response_cache,
+    normalize_text, PROMPT_VERSION
+)
+from models.schemas import CriticVerdict
+
+
+class TestCacheKey:
+    """Tests for cache key computation."""
+    
+    def test_cache_key_is_sha256(self):
+        """Test that the key is a SHA-256 hex digest including the prompt version."""
+        key = compute_cache_key("critic", "notes")
+        expected = hashlib.sha256(f"{PROMPT_VERSION}\x1fcritic\x1fnotes".encode()).hexdigest()
+        
+        assert len(key) == 64
+        assert key == expected
+    
+    def test_cache_key_is_deterministic(self):
+        """Test that same inputs produce same key."""
+        assert compute_cache_key("a", "b") == compute_cache_key("a", "b")
+    
+    def test_cache_key_differs_for_different_inputs(self):
+        """Test that part boundaries and contents both affect the key."""
+        assert compute_cache_key("ab", "c") != compute_cache_key("a", "bc")
+        assert compute_cache_key("First text") != compute_cache_key("Second text")
+    
+    def test_cache_key_changes_with_prompt_version(self):
+        """Test that bumping the prompt version invalidates keys."""
+        key = compute_cache_key("notes")
+        with patch.object(llm_cache, 'PROMPT_VERSION', PROMPT_VERSION + "-next"):
+            assert compute_cache_key("notes") != key
+
+
+class TestNormalizeText:
+    """Tests for whitespace normalization of notes."""
+    
+    def test_collapses_whitespace_and_blank_lines(self):
+        """Test that wrapping and indentation differences are removed."""
+        messy = "  Workshop on ML\n\n\t45   students attended  \n"
+        assert normalize_text(messy) == "Workshop on ML\n45 students attended"
+    
+    def test_preserves_content(self):
+        """Test that case and digits are never altered."""
+        assert normalize_text("Dr. Priya: 45") != normalize_text("dr. priya: 54")
+
+
+class TestResponseCache:
+    """Tests for storing and retrieving responses."""
+    
+    @pytest.fixture
+    def verdict(self):
+        return CriticVerdict(is_safe=True, confidence=0.9, issues=[], reasoning="OK")
+    
+    def test_miss_returns_none(self):
+        """Test that unknown keys return None."""
+        assert get_cached_response("missing") is None
+    
+    def test_hit_returns_copy(self, verdict):
+        """Test that cached responses are returned as independent copies."""
+        cache_response("key", verdict)
+        
+        cached = get_cached_response("key")
+        assert cached == verdict
+        assert cached is not verdict
+        
+        cached.issues.append("mutated")
+        assert get_cached_response("key").issues == []
+    
+    def test_expired_entries_are_dropped(self, verdict):
+        """Test that entries past their TTL are treated as misses."""
+        with patch.object(llm_cache.time, 'monotonic', return_value=0.0):
+            cache_response("key", verdict)
+        with patch.object(llm_cache.time, 'monotonic', return_value=llm_cache.CACHE_TTL_SECONDS + 1.0):
+            assert get_cached_response("key") is None
+    
+    def test_oldest_entry_evicted_when_full(self, verdict):
+        """Test that the cache stays bounded."""
+        with patch.object(llm_cache, 'CACHE_MAX_ENTRIES', 2):
+            cache_response("first", verdict)
+            cache_response("second", verdict)
+            cache_response("third", verdict)
+        
+        assert get_cached_response("first") is None
+        assert get_cached_response("third") is not None
+    
+    def test_concurrent_writers_stay_bounded(self, verdict):
+        """Test that threads storing and reading at once never break eviction."""
+        errors = []
+        
+        def worker(prefix):
+            try:
+                for i in range(200):
+                    cache_response(f"{prefix}-{i}", verdict)
+                    get_cached_response(f"{prefix}-{i // 2}")
+            except Exception as e:
+                errors.append(e)
+        
+        with patch.object(llm_cache, 'CACHE_MAX_ENTRIES', 4):
+            threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(timeout=10)
+        
+        assert errors == []
+        assert len(llm_cache._response_cache) <= 4
+    
+    def test_clear_response_cache(self, verdict):
+        """Test that clearing removes all entries."""
+        cache_response("key", verdict)
+        clear_response_cache()
+        assert get_cached_response("key") is None
+
+
+class TestAgentCaching:
+    """Tests that the agents consult the cache before calling Gemini."""
+    
+    def test_check_consistency_reuses_cached_verdict(self, patched_gemini_client, sample_raw_text):
+        """Test that identical Critic inputs only hit the API once."""
+        from core.critic import check_consistency
+        
+        mock_response = SimpleNamespace(
+            parsed=CriticVerdict(is_safe=True, confidence=0.9, issues=[], reasoning="OK"),
+            text=None
+        )
+        patched_gemini_client.models.generate_content.return_value = mock_response
+        
+        first = check_consistency(sample_raw_text, "report")
+        second = check_consistency(sample_raw_text, "report")
+        
+        assert first == second
+        assert patched_gemini_client.models.generate_content.call_count == 1
+    
+    def test_fallback_verdict_is_not_cached(self, patched_gemini_client, sample_raw_text):
+        """Test that reduced-confidence fallbacks are retried on the next call."""
+        from core.critic import check_consistency
+        
+        mock_response = SimpleNamespace(parsed=None, text="invalid json {")
+        patched_gemini_client.models.generate_content.return_value = mock_response
+        
+        check_consistency(sample_raw_text, "report")
+        check_consistency(sample_raw_text, "report")
+        
+        assert patched_gemini_client.models.generate_content.call_count == 2
+    
+    def test_generate_narrative_reuses_cached_narrative(
+        self, patched_gemini_client, sample_event_facts, sample_raw_text, mock_ghostwriter_response
+    ):
+        """Test that identical Ghostwriter inputs only hit the API once."""
+        from core.ghostwriter import generate_narrative
+        
+        patched_gemini_client.models.generate_content.return_value = mock_ghostwriter_response
+        
+        generate_narrative(sample_event_facts, sample_raw_text)
+        generate_narrative(sample_event_facts, sample_raw_text)
+        
+        assert patched_gemini_client.models.generate_content.call_count == 1
+    
+    def test_check_consistency_ignores_whitespace_only_changes(self, patched_gemini_client, sample_raw_text):
+        """Test that re-wrapped notes reuse the verdict, but edited numbers don't."""
+        from core.critic import check_consistency
+        
+        mock_response = SimpleNamespace(
+            parsed=CriticVerdict(is_safe=True, confidence=0.9, issues=[], reasoning="OK"),
+            text=None
+        )
+        patched_gemini_client.models.generate_content.return_value = mock_response
+        
+        check_consistency("45 students attended.\nGreat event.", "report")
+        check_consistency("  45   students attended.\n\nGreat event.  ", "report")
+        assert patched_gemini_client.models.generate_content.call_count == 1
+        
+        check_consistency("54 students attended.\nGreat event.", "report")
+        assert patched_gemini_client.models.generate_content.call_count == 2
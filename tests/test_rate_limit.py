@@ -0,0 +1,120 @@
+"""
+Unit tests for the Rate Limiter module.
+Tests cover: token bucket pacing, fail-fast behavior, and per-key buckets.
+"""
+import asyncio
+import pytest
+from unittest.mock import patch, AsyncMock
+
+from core import rate_limit
+from core.rate_limit import TokenBucket, get_rate_limiter
+from core.llm import RateLimitError, api_key_digest
+
+
+class TestTokenBucket:
+    """Tests for the TokenBucket pacing logic."""
+    
+    @pytest.fixture
+    def clock(self):
+        """Freeze the monotonic clock so refills are controlled by the test."""
+        with patch.object(rate_limit.time, 'monotonic', return_value=1000.0) as mock_clock:
+            yield mock_clock
+    
+    def test_burst_up_to_capacity_does_not_wait(self, clock):
+        """Test that a full bucket serves `capacity` calls immediately."""
+        bucket = TokenBucket(capacity=3, refill_rate=1.0)
+        with patch.object(rate_limit.time, 'sleep') as mock_sleep:
+            for _ in range(3):
+                bucket.acquire()
+        
+        mock_sleep.assert_not_called()
+    
+    def test_waits_for_refill_when_empty(self, clock):
+        """Test that callers beyond capacity wait for their share of the refill."""
+        bucket = TokenBucket(capacity=1, refill_rate=0.5)
+        with patch.object(rate_limit.time, 'sleep') as mock_sleep:
+            bucket.acquire()
+            bucket.acquire()
+            bucket.acquire()
+        
+        assert [c.args[0] for c in mock_sleep.call_args_list] == [2.0, 4.0]
+    
+    def test_refills_over_time(self, clock):
+        """Test that tokens come back as time passes."""
+        bucket = TokenBucket(capacity=1, refill_rate=1.0)
+        with patch.object(rate_limit.time, 'sleep') as mock_sleep:
+            bucket.acquire()
+            clock.return_value += 1.0
+            bucket.acquire()
+        
+        mock_sleep.assert_not_called()
+    
+    def test_raises_when_wait_exceeds_limit(self, clock):
+        """Test fail-fast with RateLimitError instead of a very long wait."""
+        bucket = TokenBucket(capacity=1, refill_rate=0.01)
+        bucket.acquire()
+        
+        with pytest.raises(RateLimitError) as exc_info:
+            bucket.acquire(max_wait=5)
+        assert exc_info.value.retry_after == 100
+    
+    def test_rejected_caller_does_not_consume_token(self, clock):
+        """Test that a fail-fast rejection leaves the queue unchanged."""
+        bucket = TokenBucket(capacity=1, refill_rate=0.5)
+        with patch.object(rate_limit.time, 'sleep') as mock_sleep:
+            bucket.acquire()
+            with pytest.raises(RateLimitError):
+                bucket.acquire(max_wait=1)
+            bucket.acquire()
+        
+        mock_sleep.assert_called_once_with(2.0)
+    
+    def test_acquire_async_waits_without_blocking(self, clock):
+        """Test that the async variant uses asyncio.sleep."""
+        bucket = TokenBucket(capacity=1, refill_rate=1.0)
+        
+        async def run():
+            await bucket.acquire_async()
+            await bucket.acquire_async()
+        
+        with patch.object(rate_limit.asyncio, 'sleep', new_callable=AsyncMock) as mock_sleep:
+            asyncio.run(run())
+        
+        mock_sleep.assert_awaited_once_with(1.0)
+
+
+class TestRateLimiterRegistry:
+    """Tests for per-key bucket lookup."""
+    
+    def test_same_key_shares_bucket(self):
+        """Test that one API key always maps to one bucket."""
+        assert get_rate_limiter("key-a") is get_rate_limiter("key-a")
+    
+    def test_different_keys_get_separate_buckets(self):
+        """Test that quotas are tracked per API key."""
+        assert get_rate_limiter("key-a") is not get_rate_limiter("key-b")
+    
+    def test_default_bucket_is_free_tier(self):
+        """Test the default capacity matches the free-tier quota."""
+        bucket = get_rate_limiter("key-a")
+        assert bucket.capacity == rate_limit.DEFAULT_REQUESTS_PER_MINUTE
+    
+    def test_buckets_are_not_keyed_by_raw_key(self):
+        """Test that the registry stores a digest of the API key, not the key itself."""
+        get_rate_limiter("test-key-secret")
+        
+        assert "test-key-secret" not in rate_limit._buckets
+        assert api_key_digest("test-key-secret") in rate_limit._buckets
+    
+    def test_registry_evicts_least_recently_used(self):
+        """Test that the registry stays bounded and keeps recently used buckets."""
+        with patch.object(rate_limit, 'MAX_TRACKED_KEYS', 2):
+            first = get_rate_limiter("key-a")
+            get_rate_limiter("key-b")
+            get_rate_limiter("key-a")  # Mark key-a as recently used
+            second = get_rate_limiter("key-b")
+            get_rate_limiter("key-c")  # Evicts key-a
+            
+            assert len(rate_limit._buckets) == 2
+            assert get_rate_limiter("key-b") is second
+            assert get_rate_limiter("key-a") is not first
@@ -57,6 +57,10 @@ class TestJinjaSanitization:
         result = sanitize_jinja_input(clean)
         
         assert result == clean
+    
+    def test_sanitize_lone_closing_delimiter(self):
+        """Test that a closing delimiter without an opening brace is still escaped."""
+        assert sanitize_jinja_input("Prize pool: 500}} cash") == "Prize pool: 500} } cash"
 
 
 class TestSanitizeViewModel:
@@ -100,11 +104,10 @@ class TestSanitizeViewModel:
     
     def test_list_fields_preserved_if_empty(self, sample_event_facts):
         """Test that empty list fields remain as empty lists."""
-        sample_event_facts.judges = []
-        sample_event_facts.student_coordinators = []
+        facts = sample_event_facts.model_copy(update={"judges": [], "student_coordinators": []})
         
         report = FullReport(
-            facts=sample_event_facts,
+            facts=facts,
             narrative=EventNarrative(
                 executive_summary="Summary",
                 key_takeaways=["Point"]
@@ -184,3 +187,22 @@ class TestRenderReport:
             assert "narrative" in context
             assert "executive_summary" in context
             assert "key_takeaways" in context
+    
+    def test_render_reuses_compiled_template_parts(self, sample_full_report):
+        """Test that a second render doesn't recompile the template's XML parts."""
+        render_report(sample_full_report)
+        with patch('core.renderer.Environment.from_string') as mock_compile:
+            result = render_report(sample_full_report)
+        
+        mock_compile.assert_not_called()
+        assert result.getvalue().startswith(b"PK")  # Still a valid .docx (zip)
+    
+    def test_caching_environment_compiles_new_sources(self):
+        """Test that a changed template source is compiled rather than reused."""
+        from core.renderer import _CachingEnvironment
+        
+        env = _CachingEnvironment()
+        first = env.from_string("Hello {{ name }}")
+        
+        assert env.from_string("Hello {{ name }}") is first
+        assert env.from_string("Bye {{ name }}").render(name="Bean") == "Bye Bean"
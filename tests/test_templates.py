@@ -10,7 +10,7 @@ from unittest.mock import patch, MagicMock
 
 from core.templates import (
     load_templates, save_template, get_template, 
-    delete_template, increment_use_count, get_builtin_templates,
+    delete_template, increment_use_count, schedule_use_count_increment, get_builtin_templates,
     create_template_from_facts, apply_template, TEMPLATES_DIR
 )
 from models.schemas import EventTemplate, EventFacts
@@ -38,6 +38,12 @@ class TestBuiltinTemplates:
         templates = get_builtin_templates()
         ids = [t.id for t in templates]
         assert len(ids) == len(set(ids))
+    
+    def test_get_builtin_templates_returns_fresh_list(self):
+        """Test that callers can extend the returned list without affecting later calls."""
+        templates = get_builtin_templates()
+        templates.append(templates[0])
+        assert len(get_builtin_templates()) == 5
 
 
 class TestTemplateCRUD:
@@ -78,6 +84,19 @@ class TestTemplateCRUD:
             assert templates[0].id == sample_template.id
             assert templates[0].name == sample_template.name
     
+    def test_save_template_replaces_file_atomically(self, temp_templates_dir, sample_template):
+        """Test that a failed write leaves the previously saved template intact."""
+        with patch('core.templates.TEMPLATES_DIR', temp_templates_dir):
+            save_template(sample_template)
+            
+            updated = sample_template.model_copy(update={"use_count": 5})
+            with patch('core.templates.os.replace', side_effect=OSError("disk full")):
+                with pytest.raises(OSError):
+                    save_template(updated)
+            
+            assert get_template(sample_template.id).use_count == 0
+            assert [t.id for t in load_templates()] == [sample_template.id]
+    
     def test_get_template_by_id(self, temp_templates_dir, sample_template):
         """Test retrieving a specific template by ID."""
         with patch('core.templates.TEMPLATES_DIR', temp_templates_dir):
@@ -125,6 +144,16 @@ class TestTemplateCRUD:
             # Increment non-existent
             result = increment_use_count("non-existent-id")
             assert result is False
+    
+    def test_schedule_use_count_increment(self, temp_templates_dir, sample_template):
+        """Test that queued increments are all applied by the background writer."""
+        with patch('core.templates.TEMPLATES_DIR', temp_templates_dir):
+            save_template(sample_template)
+            
+            futures = [schedule_use_count_increment(sample_template.id) for _ in range(3)]
+            assert all(f.result(timeout=5) for f in futures)
+            
+            assert get_template(sample_template.id).use_count == 3
 
 
 class TestTemplateFactory:
@@ -2,19 +2,78 @@
 UI Components - Reusable Streamlit widgets for Bean.
 
 Includes:
+- Header image
+- Invalid API key error with re-entry button
 - Progress stepper for stage visualization
 - Confidence badge with color coding
 - Agent-styled spinners
 - Template selector for event templates
 - Smart form for fact verification
 """
+import os
 import streamlit as st
+from functools import lru_cache
 from typing import Optional, List
 from models.schemas import EventFacts, Winner, EventTemplate
 
 
+# --- HEADER IMAGE ---
+
+HEADER_IMAGE_PATH = "assets/ieee_header.png"
+
+
+@st.cache_resource(show_spinner=False)
+def _load_header_image() -> Optional[bytes]:
+    """Reads the header banner once per process; None if the asset is missing."""
+    if not os.path.exists(HEADER_IMAGE_PATH):
+        return None
+    with open(HEADER_IMAGE_PATH, "rb") as f:
+        return f.read()
+
+
+def render_header_image():
+    """Renders the IEEE header banner, if the asset is present."""
+    header_image = _load_header_image()
+    if header_image:
+        st.image(header_image, use_container_width=True)
+
+
+# --- ERROR MESSAGES ---
+
+def render_auth_error(error, button_key: Optional[str] = None):
+    """
+    Shows an invalid API key error with a button to enter a new key.
+    
+    Args:
+        error: The AuthenticationError raised by an agent
+        button_key: Widget key for the button, to keep it unique on the page
+    """
+    st.error(f"🔑 {error.message}")
+    st.warning("Your API key appears to be invalid. Please check that you've copied the full key from [Google AI Studio](https://aistudio.google.com/apikey).")
+    if st.button("🔄 Enter a New API Key", key=button_key):
+        from core.llm import reset_client
+        
+        old_key = st.session_state.get("api_key")
+        st.session_state["api_key"] = None
+        st.session_state["stage"] = "input"  # Go back to API gate
+        reset_client(old_key)  # Clear cached invalid client
+        # Use JS to trigger full page refresh for clean state
+        st.markdown('<meta http-equiv="refresh" content="0">', unsafe_allow_html=True)
+
+
 # --- TEMPLATE SELECTOR ---
 
+@st.cache_data(ttl=60, show_spinner=False)
+def load_all_templates() -> List[EventTemplate]:
+    """
+    Returns built-in templates followed by saved ones, cached across reruns.
+    
+    Call load_all_templates.clear() after changing templates on disk.
+    """
+    from core.templates import get_builtin_templates, load_templates
+    return get_builtin_templates() + load_templates()
+
+
 def render_template_selector(templates: List[EventTemplate]) -> Optional[EventTemplate]:
     """
     Renders a template selection interface.
@@ -119,6 +178,7 @@ def render_save_template_modal(facts: EventFacts) -> Optional[EventTemplate]:
                 )
                 
                 if save_template(new_template):
+                    load_all_templates.clear()
                     st.success(f"✅ Template '{template_name}' saved!")
                     return new_template
                 else:
@@ -176,15 +236,9 @@ def render_progress_stepper(current_stage: str):
 
 # --- CONFIDENCE BADGE ---
 
-def render_confidence_badge(confidence: float, show_label: bool = True):
-    """
-    Renders a color-coded confidence badge.
-    
-    Colors:
-    - Green: > 80% confidence
-    - Orange: 50-80% confidence  
-    - Red: < 50% confidence
-    """
+@lru_cache(maxsize=128)
+def _confidence_badge_html(confidence: float, show_label: bool) -> str:
+    """Builds the badge markup; memoized since verdicts repeat across reruns."""
     if confidence > 0.8:
         color = "#28a745"  # Green
         bg_color = "#d4edda"
@@ -197,7 +251,7 @@ def render_confidence_badge(confidence: float, show_label: bool = True):
     
     label = "Confidence: " if show_label else ""
     
-    st.markdown(f"""
+    return f"""
     <div style='margin-bottom: 1rem;'>
         <span style='
             background: {bg_color}; 
@@ -211,7 +265,19 @@ def render_confidence_badge(confidence: float, show_label: bool = True):
             {label}{confidence:.0%}
         </span>
     </div>
-    """, unsafe_allow_html=True)
+    """
+
+
+def render_confidence_badge(confidence: float, show_label: bool = True):
+    """
+    Renders a color-coded confidence badge.
+    
+    Colors:
+    - Green: > 80% confidence
+    - Orange: 50-80% confidence  
+    - Red: < 50% confidence
+    """
+    st.markdown(_confidence_badge_html(confidence, show_label), unsafe_allow_html=True)
 
 
 # --- AGENT SPINNERS ---
@@ -240,6 +306,8 @@ def render_smart_form(facts: EventFacts) -> EventFacts:
     """
     Renders input fields for verifying and editing extracted event facts.
     Returns the updated EventFacts object upon form submission.
+    
+    Must be called from within an st.fragment (the verify stage).
     """
     st.subheader("🕵️ Auditor's Extraction")
     st.info("Review the extracted facts below. Edit any incorrect values before proceeding.")
@@ -409,7 +477,7 @@ def render_smart_form(facts: EventFacts) -> EventFacts:
             updated_data["winners"] = edited_winners
             st.session_state["facts"] = EventFacts(**updated_data)
             st.session_state["new_winners_count"] += 1
-            st.rerun()
+            st.rerun(scope="fragment")  # Rendered inside the verify-stage fragment
 
         updated_data["winners"] = edited_winners
         
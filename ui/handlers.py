@@ -3,27 +3,36 @@ UI Handlers - Input Processing with Caching.
 
 These handlers process user inputs and delegate to core modules.
 Caching is used to avoid redundant API calls for identical inputs.
+The Ghostwriter can also be started speculatively while facts are reviewed.
 """
-import streamlit as st
+import asyncio
 import hashlib
+import logging
+import streamlit as st
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Optional
 from core.auditor import extract_facts
-from core.llm import get_gemini_client, DEFAULT_MODEL, RateLimitError, AuthenticationError, is_rate_limit_error, is_auth_error
+from core.ghostwriter import generate_narrative
+from core.critic import check_consistency, build_critic_inputs
+from core.llm import get_gemini_client, DEFAULT_MODEL, classify_client_error
+from core.rate_limit import get_rate_limiter
+from core.llm_cache import compute_cache_key, normalize_text, CACHE_TTL_SECONDS
 from google.genai.errors import ClientError
-from models.schemas import EventFacts
+from models.schemas import EventFacts, EventNarrative
 
+logger = logging.getLogger(__name__)
 
-def _compute_text_hash(text: str) -> str:
-    """Compute a stable hash for caching purposes."""
-    return hashlib.md5(text.encode()).hexdigest()
+# Background workers for speculative Ghostwriter calls (shared by all sessions)
+_speculation_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="bean-speculate")
 
 
-@st.cache_data(show_spinner=False)
+@st.cache_data(ttl=CACHE_TTL_SECONDS, show_spinner=False)
 def _cached_extract_facts(text_hash: str, text: str, api_key: str) -> dict:
     """
     Cached fact extraction - converts to dict for Streamlit serialization.
     
-    Uses text_hash as the primary cache key to detect duplicate inputs.
+    Uses text_hash (SHA-256 of the text and prompt version) as the primary
+    cache key to detect duplicate inputs.
     Returns a dict that will be converted back to EventFacts.
     """
     facts = extract_facts(text, api_key=api_key)
@@ -34,42 +43,21 @@ def handle_text_process(raw_text: str, api_key: str) -> EventFacts:
     """
     Processes raw text through the Auditor.
     Results are cached to avoid redundant API calls for identical input.
+    Whitespace is normalized first so re-pasted notes reuse the cached result.
     """
     with st.spinner("The Auditor is reading your notes..."):
-        text_hash = _compute_text_hash(raw_text)
-        facts_dict = _cached_extract_facts(text_hash, raw_text, api_key)
+        text = normalize_text(raw_text)
+        text_hash = compute_cache_key("auditor", text)
+        facts_dict = _cached_extract_facts(text_hash, text, api_key)
         return EventFacts(**facts_dict)
 
 
-def handle_audio_process(audio_file, api_key: str) -> Optional[EventFacts]:
-    """
-    Processes audio file through Gemini's multimodal API.
-    
-    Uses Gemini's native audio understanding to:
-    1. Transcribe the audio content
-    2. Extract structured facts directly from the audio
-    
-    This is a single-pass approach (audio → facts) rather than
-    audio → text → facts, which is more efficient and accurate.
-    
-    Args:
-        audio_file: Streamlit audio input (BytesIO-like with .read())
-        api_key: Gemini API key for this session
-        
-    Returns:
-        EventFacts if successful, None if extraction fails
-        
-    Raises:
-        RateLimitError: If API rate limit is hit
-        AuthenticationError: If API key is invalid
-    """
+def _extract_audio_facts(audio_bytes: bytes, api_key: str) -> EventFacts:
+    """Sends the recording to Gemini and parses the extracted facts."""
     from pydantic import ValidationError
     
     client = get_gemini_client(api_key)
     
-    # Read audio bytes
-    audio_bytes = audio_file.read()
-    
     # Prepare the prompt for audio fact extraction
     prompt = """You are a strict data entry clerk. Listen to the audio recording about an event and extract specific event details.
 
@@ -98,6 +86,8 @@ Extract the following fields:
 - winners: List of winners with place, prize_money, team_name, and members
 """
     
+    get_rate_limiter(api_key).acquire()
+    
     try:
         # Use Gemini's multimodal capability with audio
         response = client.models.generate_content(
@@ -122,16 +112,7 @@ Extract the following fields:
             }
         )
     except ClientError as e:
-        if is_rate_limit_error(e):
-            raise RateLimitError(
-                "API rate limit exceeded. Please wait 1 minute before trying again.",
-                retry_after=60
-            )
-        if is_auth_error(e):
-            raise AuthenticationError(
-                "Invalid API key. Please check your key and try again."
-            )
-        raise
+        raise classify_client_error(e)
     
     # Best case: SDK auto-parsed into Pydantic
     if response.parsed is not None:
@@ -146,3 +127,123 @@ Extract the following fields:
     
     raise ValueError("LLM returned empty response for audio input")
 
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def _cached_extract_audio_facts(audio_hash: str, _audio_bytes: bytes, api_key: str) -> dict:
+    """
+    Cached audio fact extraction - converts to dict for Streamlit serialization.
+    
+    The leading underscore keeps Streamlit from hashing the raw audio;
+    audio_hash (SHA-256 of the bytes and prompt version) is the cache key.
+    """
+    return _extract_audio_facts(_audio_bytes, api_key).model_dump()
+
+
+def handle_audio_process(audio_file, api_key: str) -> Optional[EventFacts]:
+    """
+    Processes audio file through Gemini's multimodal API.
+    
+    Uses Gemini's native audio understanding to:
+    1. Transcribe the audio content
+    2. Extract structured facts directly from the audio
+    
+    This is a single-pass approach (audio → facts) rather than
+    audio → text → facts, which is more efficient and accurate.
+    Results are cached by the recording's hash, so re-processing the
+    same audio doesn't call the API again.
+    
+    Args:
+        audio_file: Streamlit audio input (BytesIO-like with .read())
+        api_key: Gemini API key for this session
+        
+    Returns:
+        EventFacts if successful, None if extraction fails
+        
+    Raises:
+        RateLimitError: If API rate limit is hit
+        AuthenticationError: If API key is invalid
+    """
+    audio_bytes = audio_file.read()
+    audio_hash = compute_cache_key("auditor-audio", hashlib.sha256(audio_bytes).hexdigest())
+    facts_dict = _cached_extract_audio_facts(audio_hash, audio_bytes, api_key)
+    return EventFacts(**facts_dict)
+
+
+# --- SPECULATIVE GHOSTWRITER ---
+
+def _normalized_facts(facts: EventFacts) -> dict:
+    """Facts as a dict with every empty value (None, "", 0, []) collapsed to None."""
+    return {field: value or None for field, value in facts.model_dump().items()}
+
+
+def facts_equivalent(a: EventFacts, b: EventFacts) -> bool:
+    """
+    Checks whether two EventFacts differ only in how empty values are represented.
+    
+    The Smart Form turns missing values into "" or 0, so facts the user
+    confirmed without editing don't compare equal to the Auditor's output.
+    """
+    return _normalized_facts(a) == _normalized_facts(b)
+
+
+def _draft_speculatively(facts: EventFacts, raw_text_context: str, api_key: str) -> EventNarrative:
+    """
+    Runs the Ghostwriter, then the Critic on its draft, for unverified facts.
+    
+    The verdict isn't returned: check_consistency caches it, and the verify
+    stage builds the same Critic inputs, so its own call becomes a cache hit.
+    """
+    narrative = generate_narrative(facts, raw_text_context, api_key=api_key)
+    
+    source_text, report_text = build_critic_inputs(facts, narrative, raw_text_context)
+    try:
+        check_consistency(source_text, report_text, api_key=api_key)
+    except Exception as e:
+        # The draft is still usable; the verify stage will run the Critic itself
+        logger.warning(f"Speculative Critic pass failed: {e}")
+    
+    return narrative
+
+
+def start_speculative_narrative(facts: EventFacts, raw_text_context: str, api_key: str) -> Future:
+    """
+    Starts drafting and verifying the narrative in the background from the Auditor's facts.
+    
+    Runs while the user reviews the Smart Form; the result is only used if
+    the facts are confirmed unchanged (see resolve_speculative_narrative).
+    
+    Returns:
+        Future resolving to an EventNarrative once the Critic pass has finished
+    """
+    return _speculation_executor.submit(
+        _draft_speculatively, facts.model_copy(deep=True), raw_text_context, api_key
+    )
+
+
+async def resolve_speculative_narrative(
+    future: Optional[Future],
+    speculative_facts: Optional[EventFacts],
+    verified_facts: EventFacts
+) -> Optional[EventNarrative]:
+    """
+    Returns the speculative narrative if it was drafted from the verified facts.
+    
+    Waits for an in-flight draft rather than starting another call. Any
+    edit beyond empty-value differences discards it, since the narrative
+    must reflect what the user verified.
+    
+    Returns:
+        EventNarrative to reuse, or None if a fresh Ghostwriter call is needed
+    """
+    if future is None or speculative_facts is None:
+        return None
+    
+    if not facts_equivalent(speculative_facts, verified_facts):
+        future.cancel()
+        return None
+    
+    try:
+        return await asyncio.wrap_future(future)
+    except Exception as e:
+        logger.warning(f"Discarding failed speculative narrative: {e}")
+        return None